@@ -0,0 +1,119 @@
+"""
+Cold-start report: per-module import cost and time to first render.
+
+Each page is rendered once in a brand-new interpreter started with
+``-X importtime``, the way a fresh replica serves its first request.  The
+report lists the wall time from process start to first render, the time
+spent importing, and the packages that cost the most to import.
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --pages member_dashboard --top 20
+"""
+
+# stdlib
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+CHILD_FLAG = "--child"
+START_ENV = "DBT_SL_COLD_START_T0"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def child(page: str) -> None:
+    """Render ``page`` once and print timings; runs in the fresh interpreter."""
+    root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(root))
+    os.chdir(root)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(root / page), default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    render = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "first_render": time.time() - float(os.environ[START_ENV]),
+                "render": render,
+                "error": at.exception[0].message if at.exception else None,
+            }
+        )
+    )
+
+
+def parse_importtime(stderr: str):
+    """
+    Sum ``-X importtime`` self times per top-level package.
+
+    Returns:
+        Total import seconds and a list of (package, seconds) by cost
+    """
+    by_package = defaultdict(int)
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, _, _, module = match.groups()
+            by_package[module.split(".")[0]] += int(self_us)
+    ranked = sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+    return sum(by_package.values()) / 1e6, [(name, us / 1e6) for name, us in ranked]
+
+
+def profile_page(path: str):
+    env = dict(os.environ, **{START_ENV: repr(time.time())})
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", __file__, CHILD_FLAG, path],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    try:
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        result = {"first_render": None, "render": None, "error": process.stderr[-500:]}
+    result["imports"], result["packages"] = parse_importtime(process.stderr)
+    return result
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == CHILD_FLAG:
+        child(sys.argv[2])
+        return
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from harness import PAGES, start_emulator
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--top", type=int, default=10, help="Packages to list per page")
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    args = parser.parse_args()
+
+    # The emulator runs in this process so its imports stay out of the report
+    server = start_emulator()
+    try:
+        results = {page: profile_page(PAGES[page]) for page in args.pages}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for page, r in results.items():
+        first = f"{r['first_render']:.2f}s" if r["first_render"] is not None else "n/a"
+        render = f"{r['render']:.2f}s" if r["render"] is not None else "n/a"
+        print(f"{page}: first render {first} (script {render}, imports {r['imports']:.2f}s)")
+        for name, seconds in r["packages"][: args.top]:
+            print(f"    {name:<32}{seconds * 1000:>10.1f} ms")
+        if r["error"]:
+            print(f"  ! {r['error'].strip().splitlines()[-1]}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
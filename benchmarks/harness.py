@@ -0,0 +1,190 @@
+"""
+Shared setup for the portal benchmarks.
+
+Starts the local Semantic Layer emulator, points the client at it through
+the environment, and drives pages headlessly with
+``streamlit.testing.v1.AppTest`` (or starts a real Streamlit server) while
+sampling resident memory.  Import this module before anything that imports
+``client``, since the client reads its settings from the environment at
+import time.
+"""
+
+# stdlib
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# third party
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# first party
+from emulator import EmulatorServer, SemanticLayerEmulator
+from synthetic_data import generate_claims, load_base_members, scale_members
+
+
+PAGES = {
+    "app": "app.py",
+    "member_dashboard": "pages/01_📊_Member_Dashboard.py",
+    "query_builder": "pages/02_🌌_Query_Builder.py",
+    "basic_llm": "pages/03_🧠_Basic_LLM.py",
+    "audit_log": "pages/05_🔍_Audit_Log.py",
+}
+PAGE_TIMEOUT = 120
+
+
+def start_emulator(latency: float = 0.0, members: int = 0, seed: int = 0) -> EmulatorServer:
+    """
+    Start an emulator on a free port and point the portal at it.
+
+    Also gives the run its own result cache directory so numbers are not
+    skewed by results left over from earlier runs.
+    """
+    roster = scale_members(members, seed) if members else load_base_members()
+    server = EmulatorServer(
+        SemanticLayerEmulator(roster, generate_claims(roster, seed=seed), latency=latency)
+    ).start()
+    os.environ.update(
+        {
+            "DBT_SL_API_URL": server.url,
+            "DBT_TOKEN": "benchmark",
+            "DBT_SL_TRANSPORT": "graphql",
+            "DBT_SL_CASSETTE_MODE": "",
+            "DBT_SL_CACHE_DIR": tempfile.mkdtemp(prefix="dbt-sl-bench-"),
+        }
+    )
+    if members:
+        roster_path = Path(os.environ["DBT_SL_CACHE_DIR"]) / "members.csv"
+        # Imported lazily: the roster CSV writer is only needed at scale
+        from pyarrow import csv as pa_csv
+
+        pa_csv.write_csv(roster, roster_path)
+        os.environ["MEMBER_ROSTER_PATH"] = str(roster_path)
+    return server
+
+
+def reset_caches() -> None:
+    """Drop every process-wide cache so the next render starts cold."""
+    import streamlit as st
+
+    from result_cache import get_result_cache
+
+    get_result_cache().clear()
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def start_portal(port: int = 8599, timeout: float = 60) -> subprocess.Popen:
+    """
+    Run ``streamlit run app.py`` headless with the current environment and
+    wait until it answers its health check.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            PAGES["app"],
+            "--server.headless",
+            "true",
+            "--server.port",
+            str(port),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise TimeoutError(f"Streamlit did not start within {timeout:.0f} seconds")
+
+
+def _rss(pid: int = None) -> int:
+    if psutil is not None:
+        return psutil.Process(pid).memory_info().rss
+    with open(f"/proc/{pid or 'self'}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class RssSampler:
+    """Track the peak resident set size of a process (default: this one) in the block."""
+
+    def __init__(self, interval: float = 0.01, pid: int = None):
+        self.interval = interval
+        self.pid = pid
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self.peak = _rss(self.pid)
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss(self.pid))
+
+
+def run_page(
+    server: EmulatorServer,
+    page: str,
+    session_state: Dict[str, Any] = None,
+    timeout: float = PAGE_TIMEOUT,
+):
+    """
+    Render one page in a fresh session.
+
+    Returns:
+        The finished ``AppTest`` and a dict with the render time, Semantic
+        Layer requests and bytes, peak RSS and the first exception, if any
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / PAGES.get(page, page)), default_timeout=timeout)
+    for key, value in (session_state or {}).items():
+        at.session_state[key] = value
+
+    before = server.emulator.stats()
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        at.run()
+        seconds = time.perf_counter() - start
+    after = server.emulator.stats()
+
+    return at, {
+        "seconds": seconds,
+        "requests": after["requests"] - before["requests"],
+        "bytes_sent": after["bytes_sent"] - before["bytes_sent"],
+        "bytes_received": after["bytes_received"] - before["bytes_received"],
+        "peak_rss": rss.peak,
+        "error": at.exception[0].message if at.exception else None,
+    }
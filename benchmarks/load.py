@@ -0,0 +1,273 @@
+"""
+Concurrent-session load test.
+
+Starts the portal with ``streamlit run`` against the local Semantic Layer
+emulator and drives many simulated users through Streamlit's websocket
+protocol, the same way browsers do, so the server's threaded script runner
+and blocking HTTP client are exercised as in production.  (``AppTest``
+swaps a process-global runtime on every run, so it cannot run sessions
+concurrently.)
+
+Every session picks a member, rotating across companies, renders the home
+page and the Member Dashboard, then submits an ad hoc Query Builder query
+and a saved query.  Reports throughput, p50/p95/p99 time per step and
+Semantic Layer requests per second.
+
+    python benchmarks/load.py --sessions 200 --concurrency 200 --latency 0.5
+    python benchmarks/load.py --url ws://localhost:8501  # an already running portal
+"""
+
+# stdlib
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from itertools import cycle, zip_longest
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# third party
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+# first party
+from harness import PAGE_TIMEOUT, RssSampler, start_emulator, start_portal
+
+
+AD_HOC_METRICS = ["total_claim_amount", "total_claims_count"]
+AD_HOC_DIMENSIONS = ["claim__claim_type"]
+MEMBER_SELECTBOX_LABEL = "Select a member context"
+
+
+class PortalSession:
+    """One simulated browser tab talking to a Streamlit server."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.pages: Dict[str, str] = {}
+        self.elements: List = []
+        self.errors: List[str] = []
+        self._page_hash = ""
+        self._widgets: Dict[str, WidgetState] = {}
+        self._ws = None
+
+    async def __aenter__(self) -> "PortalSession":
+        self._ws = await connect(
+            f"{self.url}/_stcore/stream", subprotocols=["streamlit"], max_size=None
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._ws.close()
+
+    def find(self, kind: str, key: str = None, label: str = None):
+        """Return the first rendered widget of ``kind`` matching ``key``/``label``."""
+        for element in self.elements:
+            if element.WhichOneof("type") != kind:
+                continue
+            widget = getattr(element, kind)
+            if key is not None and not widget.id.endswith(f"-{key}"):
+                continue
+            if label is not None and widget.label != label:
+                continue
+            return widget
+        raise LookupError(f"No {kind} key={key} label={label} on the page")
+
+    def set_value(self, widget, value) -> None:
+        state = WidgetState(id=widget.id)
+        if isinstance(value, list):
+            state.string_array_value.data.extend(value)
+        else:
+            state.string_value = value
+        self._widgets[widget.id] = state
+
+    def click(self, widget) -> None:
+        self._widgets[widget.id] = WidgetState(id=widget.id, trigger_value=True)
+
+    async def rerun(self, page: Optional[str] = None) -> float:
+        """Run the script (switching to ``page`` if given) and return seconds taken."""
+        if page is not None:
+            self._page_hash = next(h for name, h in self.pages.items() if page in name)
+            self._widgets.clear()
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = self._page_hash
+        message.rerun_script.widget_states.widgets.extend(self._widgets.values())
+        # Button clicks only last for the run they trigger
+        self._widgets = {k: v for k, v in self._widgets.items() if not v.trigger_value}
+
+        start = time.perf_counter()
+        await self._ws.send(message.SerializeToString())
+        self.elements = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(
+                await asyncio.wait_for(self._ws.recv(), timeout=PAGE_TIMEOUT)
+            )
+            kind = forward.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {
+                    p.url_pathname or p.page_name: p.page_script_hash
+                    for p in forward.navigation.app_pages
+                }
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                self.elements.append(element)
+                if element.WhichOneof("type") == "exception":
+                    self.errors.append(element.exception.message)
+            elif kind == "script_finished":
+                return time.perf_counter() - start
+
+
+async def run_session(url: str, display_name: str) -> Dict[str, float]:
+    """Drive one user through the portal and return seconds per step."""
+    timings: Dict[str, float] = {}
+    async with PortalSession(url) as session:
+        timings["home"] = await session.rerun()
+
+        session.set_value(session.find("selectbox", label=MEMBER_SELECTBOX_LABEL), display_name)
+        timings["switch_member"] = await session.rerun()
+
+        timings["dashboard"] = await session.rerun(page="Member_Dashboard")
+
+        timings["query_builder"] = await session.rerun(page="Query_Builder")
+        session.set_value(session.find("multiselect", key="selected_metrics"), AD_HOC_METRICS)
+        await session.rerun()
+        session.set_value(
+            session.find("multiselect", key="selected_dimensions"), AD_HOC_DIMENSIONS
+        )
+        await session.rerun()
+        session.click(session.find("button", key="submit_query"))
+        timings["ad_hoc_query"] = await session.rerun()
+
+        saved = session.find("selectbox", key="selected_saved_query")
+        if saved.options:
+            session.set_value(saved, saved.options[0])
+            session.click(session.find("button", key="submit_query_sq"))
+            timings["saved_query"] = await session.rerun()
+
+        if session.errors:
+            raise RuntimeError(session.errors[0])
+    return timings
+
+
+def member_rotation(members, limit: int = 1000) -> List[str]:
+    """Interleave member display names across companies so sessions switch tenants."""
+    by_company: Dict[int, List[str]] = defaultdict(list)
+    for company_id, first, last, email in zip(
+        *(members.column(c).to_pylist() for c in ("company_id", "first_name", "last_name", "email"))
+    ):
+        if len(by_company[company_id]) < limit:
+            by_company[company_id].append(f"{first or ''} {last or ''} · {email or ''}")
+    return [name for group in zip_longest(*by_company.values()) for name in group if name]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+async def run_load(url: str, names: List[str], concurrency: int):
+    step_times: Dict[str, List[float]] = defaultdict(list)
+    errors: List[str] = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(name: str) -> None:
+        async with limit:
+            try:
+                timings = await run_session(url, name)
+            except Exception as e:
+                errors.append(f"{name}: {type(e).__name__}: {e}")
+                return
+            for step, seconds in timings.items():
+                step_times[step].append(seconds)
+
+    await asyncio.gather(*(one(name) for name in names))
+    return step_times, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50, help="Simulated users in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="Users active at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="Emulated query latency")
+    parser.add_argument("--members", type=int, default=0, help="Scale the roster to N members")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8599, help="Port for the portal")
+    parser.add_argument("--url", help="Load an already running portal instead")
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    args = parser.parse_args()
+
+    server = start_emulator(args.latency, args.members, args.seed)
+    portal = None if args.url else start_portal(args.port)
+    url = args.url or f"ws://localhost:{args.port}"
+    names = cycle(member_rotation(server.emulator.members))
+
+    before = server.emulator.stats()
+    try:
+        with RssSampler(pid=portal.pid if portal else None) as rss:
+            start = time.perf_counter()
+            step_times, errors = asyncio.run(
+                run_load(url, [next(names) for _ in range(args.sessions)], args.concurrency)
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        after = server.emulator.stats()
+        if portal:
+            portal.terminate()
+            portal.wait()
+        server.shutdown()
+        server.server_close()
+
+    # Against an external portal the emulator only sees traffic if it was
+    # pointed here, so its counters may legitimately be zero
+    requests = after["requests"] - before["requests"]
+    completed = args.sessions - len(errors)
+    results = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "completed": completed,
+        "errors": len(errors),
+        "elapsed_seconds": elapsed,
+        "sessions_per_second": completed / elapsed,
+        "pages_per_second": sum(len(v) for v in step_times.values()) / elapsed,
+        "sl_requests": requests,
+        "sl_requests_per_second": requests / elapsed,
+        "sl_bytes": (after["bytes_sent"] - before["bytes_sent"])
+        + (after["bytes_received"] - before["bytes_received"]),
+        "sl_operations": {
+            op: n - before["operations"].get(op, 0) for op, n in after["operations"].items()
+        },
+        "peak_rss_mb": rss.peak / 2**20 if portal else None,
+        "steps": {step: _percentiles(times) for step, times in step_times.items()},
+    }
+
+    print(
+        f"{completed}/{args.sessions} sessions in {elapsed:.1f}s at concurrency "
+        f"{args.concurrency}: {results['sessions_per_second']:.2f} sessions/s, "
+        f"{results['pages_per_second']:.2f} pages/s, "
+        f"{results['sl_requests_per_second']:.1f} SL requests/s"
+        + (f", portal peak RSS {results['peak_rss_mb']:.0f} MiB" if portal else "")
+    )
+    print(f"{'step':<16}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}")
+    for step, p in results["steps"].items():
+        print(f"{step:<16}{p['p50']:>10.3f}{p['p95']:>10.3f}{p['p99']:>10.3f}")
+    for error in errors[:10]:
+        print(f"  ! {error}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
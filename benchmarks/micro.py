@@ -0,0 +1,304 @@
+"""
+Microbenchmarks for the pure-Python code that runs on every rerun or result.
+
+Covers ``schema.Query`` construction and properties, ``QueryLoader.create``,
+``helpers.to_arrow_table``, ``helpers.get_shared_elements`` against the
+``catalog.MetricCatalog`` lookups, the audit log summaries and
+``chart._sort_dataframe``.  Each case is timed with ``timeit``; results
+can be saved and compared like the page benchmark.
+
+    python benchmarks/micro.py --json before.json
+    python benchmarks/micro.py --baseline before.json -k to_arrow_table
+"""
+
+# stdlib
+import argparse
+import base64
+import json
+import logging
+import statistics
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# third party
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+CASES: List[Tuple[str, Callable[[], Callable[[], object]]]] = []
+
+
+def case(name: str, **params):
+    """Register a setup function returning the callable to time."""
+
+    def decorator(setup):
+        label = name + "".join(f"[{k}={v}]" for k, v in params.items())
+        CASES.append((label, lambda: setup(**params)))
+        return setup
+
+    return decorator
+
+
+class _State(dict):
+    """Stand-in for ``st.session_state``: item and attribute access."""
+
+    __getattr__ = dict.__getitem__
+
+
+QUERY_PAYLOAD = {
+    "metrics": [{"name": f"metric_{i}"} for i in range(5)],
+    "groupBy": [
+        {"name": "metric_time", "grain": "MONTH"},
+        {"name": "claim__claim_type"},
+        {"name": "claim__provider_name"},
+    ],
+    "where": [
+        {"sql": "{{ Dimension('member__email') }} = 'bob.johnson@techcorp.com'"},
+        {"sql": "{{ TimeDimension('metric_time', 'DAY') }} >= '2024-01-01'"},
+    ],
+    "orderBy": [{"metric": {"name": "metric_0"}, "descending": True}],
+    "limit": 100,
+}
+
+
+def _query():
+    from schema import Query
+
+    return Query(**QUERY_PAYLOAD)
+
+
+@case("query_construct")
+def query_construct():
+    from schema import Query
+
+    return lambda: Query(**QUERY_PAYLOAD)
+
+
+for _prop in ("gql", "variables", "jdbc_query", "sdk"):
+
+    @case(f"query_{_prop}")
+    def query_property(prop=_prop):
+        query = _query()
+        return lambda: getattr(query, prop)
+
+
+@case("query_fingerprint")
+def query_fingerprint():
+    from schema import Query
+
+    # A new Query per call, as every rerun builds one; includes construction
+    return lambda: Query(**QUERY_PAYLOAD).fingerprint
+
+
+@case("query_loader_create")
+def query_loader_create():
+    from schema import QueryLoader
+
+    state = _State(
+        selected_metrics=["total_claim_amount", "total_claims_count"],
+        selected_dimensions=["metric_time", "claim__claim_type"],
+        selected_grain="month",
+        selected_limit=0,
+        dimension_dict={
+            "metric_time": {"type": "TIME"},
+            "claim__claim_type": {"type": "CATEGORICAL"},
+        },
+        where_column_0="claim__claim_type",
+        where_operator_0="in",
+        where_condition_0=["Medical", "Pharmacy"],
+        order_column_0="total_claim_amount",
+        order_direction_0="desc",
+    )
+    return lambda: QueryLoader(state).create()
+
+
+def _arrow_base64(rows: int) -> str:
+    rng = np.random.default_rng(0)
+    table = pa.table(
+        {
+            "metric_time__day": pa.array(
+                np.datetime64("2024-01-01") + rng.integers(0, 730, rows).astype("timedelta64[D]")
+            ),
+            "claim__claim_type": pa.array(rng.choice(["Medical", "Pharmacy", "Dental"], rows)),
+            "total_claim_amount": pa.array(rng.lognormal(5, 1, rows)),
+            "total_claims_count": pa.array(rng.integers(0, 100, rows)),
+        }
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+for _rows in (100, 10_000, 1_000_000):
+
+    @case("to_arrow_table", rows=_rows)
+    def to_arrow_table_case(rows):
+        from helpers import to_arrow_table
+
+        payload = _arrow_base64(rows)
+        return lambda: to_arrow_table(payload)
+
+
+def _metric_catalog(metrics: int, dimensions: int):
+    from catalog import MetricCatalog
+
+    rng = np.random.default_rng(0)
+    return MetricCatalog(
+        [
+            {
+                "name": f"metric_{m}",
+                "dimensions": [
+                    {"name": f"dim_{d}", "type": "CATEGORICAL"}
+                    for d in rng.choice(dimensions, dimensions // 2, replace=False)
+                ],
+            }
+            for m in range(metrics)
+        ]
+    )
+
+
+for _metrics, _dimensions in ((50, 200), (500, 2_000)):
+
+    @case("get_shared_elements", metrics=_metrics, dimensions=_dimensions)
+    def get_shared_elements_case(metrics, dimensions):
+        from helpers import get_shared_elements
+
+        rng = np.random.default_rng(0)
+        catalog = [
+            [f"dim_{d}" for d in rng.choice(dimensions, dimensions // 2, replace=False)]
+            for _ in range(metrics)
+        ]
+        return lambda: get_shared_elements(catalog)
+
+    @case("catalog_shared_dimensions", metrics=_metrics, dimensions=_dimensions)
+    def catalog_shared_dimensions_case(metrics, dimensions):
+        catalog = _metric_catalog(metrics, dimensions)
+        selected = list(catalog.metrics)
+        return lambda: catalog.shared_dimensions(selected)
+
+    @case("catalog_compatible_metrics", metrics=_metrics, dimensions=_dimensions)
+    def catalog_compatible_metrics_case(metrics, dimensions):
+        catalog = _metric_catalog(metrics, dimensions)
+        selected = list(catalog.dimensions)[:3]
+        return lambda: catalog.compatible_metrics(selected)
+
+
+def _audit_log(entries: int) -> List[Dict]:
+    rng = np.random.default_rng(0)
+    emails = [f"member{i}@techcorp.com" for i in range(500)]
+    log = []
+    for i in range(entries):
+        email = emails[rng.integers(len(emails))]
+        filtered = rng.random() > 0.01
+        log.append(
+            {
+                "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+                "query_type": rng.choice(["member_dashboard", "query_builder", "llm_query"]),
+                "member_email": email,
+                "filters_applied": [f"{{{{ Dimension('member__email') }}}} = '{email}'"]
+                if filtered
+                else [],
+                "metrics": ["total_claim_amount"],
+                "dimensions": ["metric_time__day"],
+                "row_count": int(rng.integers(0, 1000)),
+                "status": "success" if rng.random() > 0.05 else "failed",
+                "error_message": None,
+                "page": "dashboard",
+                "session_id": 1,
+            }
+        )
+    return log
+
+
+for _entries in (1_000, 50_000):
+    for _fn in ("get_audit_stats", "get_security_violations"):
+
+        @case(_fn, entries=_entries)
+        def audit_case(entries, fn=_fn):
+            import streamlit as st
+
+            import audit_logger
+
+            log = _audit_log(entries)
+
+            def run():
+                st.session_state.audit_log = log
+                return getattr(audit_logger, fn)()
+
+            return run
+
+
+for _rows in (1_000, 100_000):
+
+    @case("chart_sort_dataframe", rows=_rows)
+    def sort_dataframe_case(rows):
+        from chart import _sort_dataframe
+        from schema import Query
+
+        rng = np.random.default_rng(0)
+        query = Query(
+            metrics=[{"name": "total_claim_amount"}],
+            groupBy=[{"name": "metric_time", "grain": "DAY"}],
+        )
+        df = pd.DataFrame(
+            {
+                "metric_time__day": pd.Timestamp("2024-01-01")
+                + pd.to_timedelta(rng.permutation(rows), unit="D"),
+                "total_claim_amount": rng.lognormal(5, 1, rows),
+            }
+        )
+        return lambda: _sort_dataframe(df, query)
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"min_us": min(runs) * 1e6, "median_us": statistics.median(runs) * 1e6, "loops": number}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="keyword", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat")
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    parser.add_argument("--baseline", type=Path, help="Compare with an earlier --json file")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+    results = {}
+    print(f"{'case':<56}{'median µs':>14}{'min µs':>14}{'loops':>9}")
+    for name, setup in CASES:
+        if args.keyword and args.keyword not in name:
+            continue
+        try:
+            result = measure(setup(), args.repeat, args.min_time)
+        except ImportError as e:
+            print(f"{name:<56}  skipped: {e}")
+            continue
+        results[name] = result
+        delta = ""
+        if name in baseline:
+            change = result["median_us"] / baseline[name]["median_us"] - 1
+            delta = f" ({change:+.0%})"
+        print(
+            f"{name:<56}{result['median_us']:>14.1f}{result['min_us']:>14.1f}"
+            f"{result['loops']:>9}{delta}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
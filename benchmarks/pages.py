@@ -0,0 +1,98 @@
+"""
+End-to-end page latency benchmark.
+
+Renders each page headlessly against the local Semantic Layer emulator and
+reports cold and warm render time, GraphQL calls, bytes transferred and
+peak RSS.  "Cold" starts with every process-wide cache empty; "warm" is a
+new session after the cold one, i.e. what the next user sees.
+
+    python benchmarks/pages.py --repeat 5 --json before.json
+    python benchmarks/pages.py --repeat 5 --baseline before.json
+"""
+
+# stdlib
+import argparse
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# first party
+from harness import PAGES, ROOT, reset_caches, run_page, start_emulator
+
+
+def benchmark_page(server, page: str, repeat: int):
+    reset_caches()
+    _, cold = run_page(server, page)
+    warm_runs = [run_page(server, page)[1] for _ in range(repeat)]
+    return {
+        "cold_seconds": cold["seconds"],
+        "warm_seconds": statistics.median(r["seconds"] for r in warm_runs),
+        "cold_requests": cold["requests"],
+        "warm_requests": statistics.median(r["requests"] for r in warm_runs),
+        "cold_bytes": cold["bytes_sent"] + cold["bytes_received"],
+        "warm_bytes": statistics.median(r["bytes_sent"] + r["bytes_received"] for r in warm_runs),
+        "peak_rss_mb": max([cold["peak_rss"]] + [r["peak_rss"] for r in warm_runs]) / 2**20,
+        "error": cold["error"] or next((r["error"] for r in warm_runs if r["error"]), None),
+    }
+
+
+def _delta(value, baseline):
+    if not baseline:
+        return ""
+    return f" ({(value - baseline) / baseline:+.0%})"
+
+
+def report(results, baseline=None):
+    baseline = baseline or {}
+    header = (
+        f"{'page':<18}{'cold s':>14}{'warm s':>14}{'cold calls':>12}{'warm calls':>12}"
+        f"{'cold KiB':>14}{'warm KiB':>14}{'peak RSS MiB':>16}"
+    )
+    print(header)
+    print("-" * len(header))
+    for page, r in results.items():
+        b = baseline.get(page, {})
+        print(
+            f"{page:<18}"
+            f"{r['cold_seconds']:>8.3f}{_delta(r['cold_seconds'], b.get('cold_seconds')):>6}"
+            f"{r['warm_seconds']:>8.3f}{_delta(r['warm_seconds'], b.get('warm_seconds')):>6}"
+            f"{r['cold_requests']:>12.0f}{r['warm_requests']:>12.0f}"
+            f"{r['cold_bytes'] / 1024:>14.1f}{r['warm_bytes'] / 1024:>14.1f}"
+            f"{r['peak_rss_mb']:>16.1f}"
+        )
+        if r["error"]:
+            print(f"  ! {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="Warm renders per page")
+    parser.add_argument("--latency", type=float, default=0.2, help="Emulated query latency")
+    parser.add_argument("--members", type=int, default=0, help="Scale the roster to N members")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    parser.add_argument("--baseline", type=Path, help="Compare with an earlier --json file")
+    args = parser.parse_args()
+
+    # Pages read their assets relative to the repository root
+    os.chdir(ROOT)
+    server = start_emulator(args.latency, args.members, args.seed)
+    try:
+        results = {page: benchmark_page(server, page, args.repeat) for page in args.pages}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    report(results, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
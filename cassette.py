@@ -0,0 +1,180 @@
+# stdlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# third party
+import streamlit as st
+
+
+logger = logging.getLogger(__name__)
+
+# "record" captures Semantic Layer traffic, "replay" serves it back offline
+CASSETTE_MODE = os.getenv("DBT_SL_CASSETTE_MODE", "").strip().lower()
+CASSETTE_DIR = os.getenv("DBT_SL_CASSETTE_DIR", "").strip() or "cassettes"
+# Multiplier for recorded latencies during replay; 0 replays instantly
+REPLAY_SPEED = float(os.getenv("DBT_SL_REPLAY_SPEED", "1.0"))
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recording matches a request."""
+
+
+class Cassette:
+    """
+    Record and replay GraphQL request/response pairs on local disk.
+
+    Interactions are grouped by a key derived from the URL, GraphQL document
+    and variables (excluding ``environmentId``), so replay works across
+    tenants and environments.  Each key has a JSON Lines file: a header with
+    the request, then one line per interaction, appended as it happens, with
+    its latency and the offset at which it was sent relative to the first
+    request with that key.
+
+    Replay follows the recorded timeline.  A request is answered with the
+    last interaction sent no later than the same offset from the first
+    replayed request with that key, both scaled by ``speed``.  Status polls
+    therefore see the ``status`` the query had at that moment of the
+    recording, however often the client polls.  With ``speed`` 0 there is no
+    timeline and interactions are served in recorded order instead.  The
+    last response repeats once the recording runs out.
+    """
+
+    def __init__(self, directory: str, mode: str, speed: float = REPLAY_SPEED):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._first_seen: Dict[str, float] = {}
+        self._cursors: Dict[str, int] = {}
+        # key -> recorded interactions and their offsets, loaded once per replay
+        self._recordings: Dict[str, Tuple[List[Dict], List[float]]] = {}
+
+    @staticmethod
+    def _variables(payload: Dict) -> Dict:
+        return {
+            k: v for k, v in (payload.get("variables") or {}).items() if k != "environmentId"
+        }
+
+    @classmethod
+    def key(cls, url: str, payload: Dict) -> str:
+        text = json.dumps(
+            {"url": url, "query": payload.get("query"), "variables": cls._variables(payload)},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.jsonl"
+
+    def _load(self, key: str) -> List[Dict]:
+        """Read a key's interactions, skipping the header and any torn line."""
+        try:
+            with self._path(key).open(encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        interactions = []
+        for line in lines[1:]:
+            try:
+                interactions.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping unreadable cassette line key=%s", key[:12])
+        return interactions
+
+    def record(
+        self,
+        url: str,
+        payload: Dict,
+        status_code: int,
+        body: bytes,
+        elapsed: float,
+    ) -> None:
+        """Append one interaction to the recording for this request."""
+        key = self.key(url, payload)
+        with self._lock:
+            sent = time.monotonic() - elapsed
+            first_seen = self._first_seen.setdefault(key, sent)
+            path = self._path(key)
+            lines = []
+            if not path.exists():
+                header = {
+                    "url": url,
+                    "query": payload.get("query"),
+                    "variables": self._variables(payload),
+                }
+                lines.append(json.dumps(header))
+            lines.append(
+                json.dumps(
+                    {
+                        "status_code": status_code,
+                        "elapsed": round(elapsed, 6),
+                        "offset": round(sent - first_seen, 6),
+                        "body": body.decode("utf-8"),
+                    }
+                )
+            )
+            with path.open("a", encoding="utf-8") as f:
+                f.write("".join(f"{line}\n" for line in lines))
+
+    def replay(self, url: str, payload: Dict) -> Tuple[int, bytes]:
+        """
+        Return the recorded status code and body for this request at this
+        point of the recorded timeline, after sleeping for its recorded
+        latency scaled by ``speed``.
+
+        Raises:
+            CassetteMiss: If nothing was recorded for this request
+        """
+        key = self.key(url, payload)
+        with self._lock:
+            if key not in self._recordings:
+                loaded = self._load(key)
+                self._recordings[key] = loaded, [i.get("offset", 0.0) for i in loaded]
+            interactions, offsets = self._recordings[key]
+            if not interactions:
+                raise CassetteMiss(f"No recorded response for {url} key={key[:12]}")
+            if self.speed > 0:
+                now = time.monotonic()
+                offset = (now - self._first_seen.setdefault(key, now)) / self.speed
+                index = max(0, bisect_right(offsets, offset) - 1)
+            else:
+                index = min(self._cursors.get(key, 0), len(interactions) - 1)
+                self._cursors[key] = index + 1
+            interaction = interactions[index]
+
+        if self.speed > 0:
+            time.sleep(interaction["elapsed"] * self.speed)
+        return interaction["status_code"], interaction["body"].encode("utf-8")
+
+    def rewind(self) -> None:
+        """Restart every replay timeline from its first interaction."""
+        with self._lock:
+            self._first_seen.clear()
+            self._cursors.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette, or ``None`` when recording is off."""
+    if CASSETTE_MODE not in MODES:
+        return None
+    logger.info(
+        "Cassette enabled mode=%s dir=%s speed=%s",
+        CASSETTE_MODE,
+        CASSETTE_DIR,
+        REPLAY_SPEED,
+    )
+    return Cassette(CASSETTE_DIR, CASSETTE_MODE)
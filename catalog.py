@@ -0,0 +1,166 @@
+# stdlib
+import logging
+import os
+from functools import lru_cache, reduce
+from operator import and_, or_
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Sequence
+
+# third party
+import streamlit as st
+
+# first party
+from client import ConnAttr, QueryError, submit_request
+from queries import GRAPHQL_QUERIES
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds an environment's catalog is shared before GetMetrics runs again, so new
+# metrics from a production job show up without restarting the app
+CATALOG_TTL = int(os.getenv("DBT_SL_CATALOG_TTL", "3600"))
+# Distinct metric selections whose shared dimensions and grains are memoized
+LOOKUP_CACHE_SIZE = 1024
+
+
+class NoMetricsError(Exception):
+    """Raised when the Semantic Layer returns no metrics for an environment."""
+
+
+class MetricCatalog:
+    """
+    Indexed, read-only view of the metrics and dimensions of one environment.
+
+    ``metrics`` maps metric name to its ``GetMetrics`` entry with
+    ``dimensions`` flattened to a tuple of names; ``dimensions`` maps
+    dimension name to its entry.  A single instance is shared by every
+    session on an environment, so neither must be mutated.
+
+    Each metric's dimensions are also kept as a bitset, which makes the
+    dimensions shared by a selection of metrics a few integer ANDs.  Those
+    and the shared granularities are memoized per selection.  Each
+    dimension's metrics are indexed too, for the metrics compatible with a
+    selection of dimensions.
+    """
+
+    def __init__(self, metrics: Sequence[Dict]):
+        metric_dict, dimension_dict = {}, {}
+        for metric in metrics:
+            dimensions = metric.get("dimensions") or []
+            for dimension in dimensions:
+                dimension_dict[dimension["name"]] = dimension
+            metric_dict[metric["name"]] = {
+                **metric,
+                "dimensions": tuple(d["name"] for d in dimensions),
+            }
+        self.metrics: Mapping[str, Dict] = MappingProxyType(metric_dict)
+        self.dimensions: Mapping[str, Dict] = MappingProxyType(dimension_dict)
+
+        dimension_metrics: Dict[str, set] = {name: set() for name in dimension_dict}
+        for name, metric in metric_dict.items():
+            for dimension in metric["dimensions"]:
+                dimension_metrics[dimension].add(name)
+        self._dimension_metrics = {d: frozenset(m) for d, m in dimension_metrics.items()}
+
+        self._dimension_names = tuple(dimension_dict)
+        bits = {name: 1 << i for i, name in enumerate(self._dimension_names)}
+        self._metric_bits = {
+            name: reduce(or_, (bits[d] for d in metric["dimensions"]), 0)
+            for name, metric in metric_dict.items()
+        }
+        self._grains = {
+            name: frozenset(g.strip().upper() for g in metric.get("queryableGranularities") or [])
+            for name, metric in metric_dict.items()
+        }
+        self._requires_metric_time = frozenset(
+            name for name, metric in metric_dict.items() if metric.get("requiresMetricTime")
+        )
+        self._shared_dimensions = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._intersect_dimensions)
+        self._shared_granularities = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._intersect_grains)
+
+    def __len__(self) -> int:
+        return len(self.metrics)
+
+    def _known(self, metrics: Iterable[str]) -> FrozenSet[str]:
+        return frozenset(m for m in metrics if m in self._metric_bits)
+
+    def _intersect_dimensions(self, metrics: FrozenSet[str]) -> FrozenSet[str]:
+        if not metrics:
+            return frozenset()
+        bits = reduce(and_, (self._metric_bits[m] for m in metrics))
+        names = []
+        while bits:
+            low = bits & -bits
+            names.append(self._dimension_names[low.bit_length() - 1])
+            bits ^= low
+        return frozenset(names)
+
+    def _intersect_grains(self, metrics: FrozenSet[str]) -> FrozenSet[str]:
+        if not metrics:
+            return frozenset()
+        return frozenset.intersection(*(self._grains[m] for m in metrics))
+
+    def shared_dimensions(self, metrics: Iterable[str]) -> FrozenSet[str]:
+        """Dimensions every one of ``metrics`` can be grouped by."""
+        return self._shared_dimensions(self._known(metrics))
+
+    def shared_granularities(self, metrics: Iterable[str]) -> FrozenSet[str]:
+        """Upper-case time grains every one of ``metrics`` can be queried at."""
+        return self._shared_granularities(self._known(metrics))
+
+    def metrics_for(self, dimension: str) -> FrozenSet[str]:
+        """Metrics that can be grouped by ``dimension``."""
+        return self._dimension_metrics.get(dimension, frozenset())
+
+    def compatible_metrics(self, dimensions: Iterable[str]) -> FrozenSet[str]:
+        """Metrics that can be grouped by every one of ``dimensions``; unknown ones are ignored."""
+        known = [d for d in dimensions if d in self._dimension_metrics]
+        if not known:
+            return frozenset(self.metrics)
+        return frozenset.intersection(*(self._dimension_metrics[d] for d in known))
+
+    def requires_metric_time(self, metrics: Iterable[str]) -> bool:
+        """Whether any of ``metrics`` must be grouped by ``metric_time``."""
+        return not self._requires_metric_time.isdisjoint(metrics)
+
+    def dimension_type(self, dimension: str) -> str:
+        """The dimension's type, such as ``TIME`` or ``CATEGORICAL``."""
+        return self.dimensions[dimension]["type"]
+
+
+@st.cache_resource(show_spinner=False, ttl=CATALOG_TTL)
+def _load_catalog(environment: str, _conn: ConnAttr) -> MetricCatalog:
+    json = submit_request(_conn, {"query": GRAPHQL_QUERIES["metrics"]})
+    metrics = (json.get("data") or {}).get("metrics")
+    if metrics is None:
+        try:
+            error = json["errors"][0]["message"]
+        except (KeyError, IndexError, TypeError):
+            error = None
+        if error:
+            raise QueryError(error)
+    if not metrics:
+        raise NoMetricsError("No metrics returned")
+    catalog = MetricCatalog(metrics)
+    logger.info(
+        "Loaded metric catalog environment=%s metrics=%s dimensions=%s",
+        environment,
+        len(catalog.metrics),
+        len(catalog.dimensions),
+    )
+    return catalog
+
+
+def get_catalog(conn: ConnAttr) -> MetricCatalog:
+    """
+    Return the metric catalog for a connection's environment.
+
+    ``GetMetrics`` runs once per host and environment id and ``CATALOG_TTL``
+    with whichever token asks first; every session on that environment,
+    whatever its company token, shares the result.  Failures are not cached.
+
+    Raises:
+        QueryError: If the request fails or returns an error
+        NoMetricsError: If the environment has no metrics
+    """
+    return _load_catalog(f"{conn.host}|{conn.params.get('environmentid')}", conn)
@@ -1,13 +1,28 @@
 # stdlib
+import base64
+import hashlib
+import itertools
+import json
 import logging
 import os
+import random
+import re
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import copy_context
 from dataclasses import dataclass
-from typing import Dict
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 from urllib.parse import parse_qs, urlparse
 
 # third party
+import pyarrow as pa
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 try:
     from dotenv import load_dotenv
@@ -18,7 +33,16 @@ if load_dotenv:
     load_dotenv()
 
 # first party
+from cassette import CassetteMiss, get_cassette
+from planner import PlannedQuery, plan_queries, row_domain
 from queries import GRAPHQL_QUERIES
+from resilience import CircuitBreaker, TokenBucket
+from result_cache import cache_key, get_result_cache
+from rollup import cube_query, derivable, derive, get_result_index, reaggregations
+from scheduler import AdmissionTimeout, Priority, get_scheduler
+from schema import Query, batch_gql
+from streaming import decode_json_stream
+import telemetry
 
 
 logger = logging.getLogger(__name__)
@@ -41,6 +65,65 @@ class ConnAttr:
 
 RESULT_STATUSES = ["pending", "running", "compiled", "failed", "successful"]
 
+# HTTP connection pooling; overridable from the environment
+CONNECT_TIMEOUT = float(os.getenv("DBT_SL_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("DBT_SL_READ_TIMEOUT", "60"))
+POOL_MAXSIZE = int(os.getenv("DBT_SL_POOL_MAXSIZE", "10"))
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Resilience: per-tenant rate limit, retries and a per-host circuit breaker
+RATE_LIMIT = float(os.getenv("DBT_SL_RATE_LIMIT", "20"))
+RATE_BURST = float(os.getenv("DBT_SL_RATE_BURST", "40"))
+MAX_RETRIES = int(os.getenv("DBT_SL_MAX_RETRIES", "3"))
+RETRY_BUDGET = float(os.getenv("DBT_SL_RETRY_BUDGET", "10"))
+RETRY_INITIAL_INTERVAL = 0.5
+RETRY_MAX_INTERVAL = 4.0
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+# Mutations may already have run after a read timeout or a gateway error, so
+# they are retried only when the server cannot have accepted them
+MUTATION_RETRYABLE_STATUSES = {429, 503}
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("DBT_SL_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("DBT_SL_BREAKER_RESET", "30"))
+
+# Send GraphQL requests here instead of the host in the JDBC URL, e.g. a local
+# emulator started with `python emulator.py`
+API_URL = os.getenv("DBT_SL_API_URL", "").strip().rstrip("/")
+
+# Result polling; intervals are in seconds
+POLL_INITIAL_INTERVAL = float(os.getenv("DBT_SL_POLL_INITIAL_INTERVAL", "0.1"))
+POLL_MAX_INTERVAL = float(os.getenv("DBT_SL_POLL_MAX_INTERVAL", "2.0"))
+POLL_BACKOFF_FACTOR = 1.6
+QUERY_TIMEOUT = float(os.getenv("DBT_SL_QUERY_TIMEOUT", "300"))
+MAX_CONCURRENT_QUERIES = int(os.getenv("DBT_SL_MAX_CONCURRENT_QUERIES", "8"))
+
+STATUS_FIELDS = ("error", "queryId", "status")
+RESULT_FIELDS = ("arrowResult", "error", "queryId", "sql", "status")
+
+# Operation name of a GraphQL document, used to label request metrics
+_OPERATION = re.compile(r"\s*(?:query|mutation)\s+(\w+)")
+_MUTATION = re.compile(r"\s*mutation\b")
+
+
+class QueryError(Exception):
+    """Raised when a Semantic Layer query cannot be created or fails."""
+
+    def __init__(self, message: str, query_id: str = None, sql: str = None):
+        super().__init__(message)
+        self.query_id = query_id
+        self.sql = sql
+
+
+class QueryTimeoutError(QueryError):
+    """Raised when a query does not finish before its deadline."""
+
+
+class ServiceUnavailableError(QueryError):
+    """Raised when the Semantic Layer is unreachable, throttled or failing fast."""
+
+
+class ConnectionNotConfiguredError(Exception):
+    """Raised when no JDBC URL or service token is configured for a company."""
+
 
 def _mask_token(token: str, *, keep_start: int = 6, keep_end: int = 4) -> str:
     if not token:
@@ -87,24 +170,16 @@ def get_company_token(company: str) -> str:
     return token
 
 
-def resolve_jdbc_url(member_email: str = None) -> str:
-    """
-    Resolve JDBC URL with company-specific token based on member email.
-
-    Args:
-        member_email: Email address to determine which company token to use
-    """
+def _company_jdbc_url(company: Optional[str]) -> str:
+    """Build the JDBC URL for a company, or for the default token if ``None``."""
     try:
         jdbc_url = st.secrets["JDBC_URL"]
     except Exception:
-        # Determine which token to use based on member email
-        if member_email:
-            company = get_company_from_email(member_email)
+        if company:
             token = get_company_token(company)
             logger.info(
-                "Using company-specific token company=%s email=%s token=%s",
+                "Using company-specific token company=%s token=%s",
                 company,
-                member_email,
                 _mask_token(token),
             )
         else:
@@ -139,6 +214,40 @@ def resolve_jdbc_url(member_email: str = None) -> str:
     return jdbc_url
 
 
+def resolve_jdbc_url(member_email: str = None) -> str:
+    """
+    Resolve JDBC URL with company-specific token based on member email.
+
+    Args:
+        member_email: Email address to determine which company token to use
+    """
+    company = get_company_from_email(member_email) if member_email else None
+    return _company_jdbc_url(company)
+
+
+@st.cache_resource(show_spinner=False)
+def get_company_connection(company: Optional[str]) -> ConnAttr:
+    """
+    Return the process-wide connection for a company.
+
+    Each company's token is resolved once and the resulting ``ConnAttr`` is
+    shared by every session, so switching members is a lookup rather than a
+    cache flush.  ``None`` selects the default ``DBT_TOKEN`` connection.
+    Failures raise, so they are not cached.
+
+    Raises:
+        ConnectionNotConfiguredError: If no usable JDBC URL is configured
+    """
+    jdbc_url = _company_jdbc_url(company)
+    conn = get_connection_attributes(jdbc_url) if jdbc_url else None
+    if conn is None:
+        raise ConnectionNotConfiguredError(
+            f"No JDBC connection configured for company={company or 'default'}"
+        )
+    logger.info("Registered connection company=%s", company or "default")
+    return conn
+
+
 def ensure_connection(force_refresh: bool = False, member_email: str = None) -> ConnAttr:
     """
     Ensure connection to dbt Semantic Layer with company-specific token.
@@ -151,35 +260,106 @@ def ensure_connection(force_refresh: bool = False, member_email: str = None) ->
     if not member_email:
         member_email = st.session_state.get("selected_member_email")
 
-    jdbc_url = resolve_jdbc_url(member_email)
-    if not jdbc_url:
+    company = get_company_from_email(member_email) if member_email else None
+    if force_refresh:
+        get_company_connection.clear(company)
+
+    try:
+        conn = get_company_connection(company)
+    except ConnectionNotConfiguredError as e:
+        logger.warning("%s", e)
         st.error(
             "JDBC connection details are not configured. Set `JDBC_URL` in `.streamlit/secrets.toml` or provide service tokens in your environment/.env file."
         )
         st.stop()
 
-    # Force refresh if member email changed (switching companies)
-    current_member = st.session_state.get("_conn_member_email")
-    if member_email and current_member != member_email:
-        logger.info(f"Member changed from {current_member} to {member_email}, refreshing connection")
-        force_refresh = True
-        st.session_state._conn_member_email = member_email
+    if st.session_state.get("conn") is not conn:
+        logger.info(
+            "Using connection company=%s for member %s",
+            company or "default",
+            member_email,
+        )
+        st.session_state.conn = conn
+
+    return conn
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session(host: str, auth_header: str) -> requests.Session:
+    """
+    Return a keep-alive HTTP session for a host and tenant token.
+
+    Sessions are cached process-wide so every Streamlit session talking to the
+    same tenant reuses one bounded pool of TLS connections instead of paying a
+    new handshake per request.
+
+    Args:
+        host: Base URL of the API, e.g. "https://semantic-layer.cloud.getdbt.com"
+        auth_header: Authorization header value for the tenant
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {"Authorization": auth_header, "Connection": "keep-alive"}
+    )
+    logger.info(
+        "Created pooled HTTP session host=%s pool_maxsize=%s",
+        host,
+        POOL_MAXSIZE,
+    )
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter(host: str, auth_header: str) -> TokenBucket:
+    """Return the process-wide request rate limiter for a tenant token."""
+    return TokenBucket(rate=RATE_LIMIT, capacity=RATE_BURST)
+
 
-    if force_refresh or st.session_state.get("jdbc_url") != jdbc_url:
-        st.session_state.jdbc_url = jdbc_url
+@st.cache_resource(show_spinner=False)
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker guarding a host."""
+    return CircuitBreaker(
+        failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT
+    )
+
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(r.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+def _decode_body(body: bytes, stream: bool, fallback_error: str) -> Dict:
+    with telemetry.span("sl.decode", response_bytes=len(body), streamed=stream) as decode_span:
         try:
-            get_connection_attributes.clear()
-        except AttributeError:
-            st.cache_data.clear()
-
-    if force_refresh or "conn" not in st.session_state or st.session_state.conn is None:
-        conn = get_connection_attributes(jdbc_url)
-        if conn is None:
-            st.error("Unable to initialize the Semantic Layer connection.")
-            st.stop()
-        st.session_state.conn = conn
+            decoded = decode_json_stream([body]) if stream else json.loads(body)
+        except ValueError:
+            decoded = {"data": None, "errors": [{"message": fallback_error}]}
+    telemetry.observe("dbt_sl_transfer_seconds", decode_span.duration, phase="decode")
+    return decoded
 
-    return st.session_state.conn
+
+def _connect_failed(error: requests.RequestException) -> bool:
+    """Whether a request failed before the connection was established."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(
+        reason, NewConnectionError
+    )
+
+
+def _operation_name(payload: Dict) -> str:
+    match = _OPERATION.match(payload.get("query") or "")
+    return match.group(1) if match else "anonymous"
 
 
 def submit_request(
@@ -188,34 +368,218 @@ def submit_request(
     source: str = None,
     host_override: str = None,
     path: str = "/api/graphql",
+    stream: bool = False,
+) -> Dict:
+    """
+    POST a GraphQL payload and return the decoded JSON response.
+
+    With ``stream=True`` the body is parsed incrementally and any
+    ``arrowResult`` values are returned as decoded ``pyarrow.Table`` objects,
+    avoiding holding the base64 text and its decoded bytes side by side.
+
+    When ``DBT_SL_CASSETTE_MODE`` is ``record`` every exchange is also saved
+    to disk; in ``replay`` mode responses are served from those recordings
+    and no network request is made.
+
+    Each call is recorded as an ``sl.request`` span with child spans for
+    every HTTP attempt and for decoding the body.
+    """
+    operation = _operation_name(payload)
+    with telemetry.span("sl.request", operation=operation, path=path) as request_span:
+        json = _submit_request(
+            _conn_attr, payload, request_span, source, host_override, path, stream
+        )
+    telemetry.count(
+        "dbt_sl_request_bytes_total",
+        request_span.attributes.get("request_bytes", 0),
+        operation=operation,
+    )
+    telemetry.count(
+        "dbt_sl_response_bytes_total",
+        request_span.attributes.get("response_bytes", 0),
+        operation=operation,
+    )
+    return json
+
+
+def _submit_request(
+    _conn_attr: ConnAttr,
+    payload: Dict,
+    request_span: telemetry.Span,
+    source: str,
+    host_override: str,
+    path: str,
+    stream: bool,
 ) -> Dict:
-    # TODO: This should take into account multi-region and single-tenant
-    url = f"{host_override or _conn_attr.host}{path}"
+    host = host_override or _conn_attr.host
+    url = f"{host}{path}"
+    operation = request_span.attributes["operation"]
+    mutation = bool(_MUTATION.match(payload.get("query") or ""))
+    retryable = MUTATION_RETRYABLE_STATUSES if mutation else RETRYABLE_STATUSES
     logger.info(
         "Submitting GraphQL request url=%s has_variables=%s snippet=%s",
         url,
         "variables" in payload,
         payload.get("query", "")[:120].replace("\n", " "),
     )
-    if "variables" not in payload:
-        payload["variables"] = {}
-    payload["variables"]["environmentId"] = _conn_attr.params["environmentid"]
-    r = requests.post(
-        url,
-        json=payload,
-        headers={
-            "Authorization": _conn_attr.auth_header,
-            "x-dbt-partner-source": source or "streamlit",
+    # Copy rather than mutate so callers' payloads (and cache keys) stay stable
+    payload = {
+        **payload,
+        "variables": {
+            **(payload.get("variables") or {}),
+            "environmentId": _conn_attr.params["environmentid"],
         },
-    )
+    }
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        try:
+            status_code, body = cassette.replay(url, payload)
+        except CassetteMiss as e:
+            raise QueryError(str(e)) from e
+        logger.info("Replayed response status=%s", status_code)
+        request_span.set(status_code=status_code, replayed=True, response_bytes=len(body))
+        telemetry.count("dbt_sl_requests_total", operation=operation, status=status_code)
+        return _decode_body(body, stream, f"HTTP {status_code} from {host}")
+
+    session = get_http_session(host, _conn_attr.auth_header)
+    limiter = get_rate_limiter(host, _conn_attr.auth_header)
+    breaker = get_circuit_breaker(host)
+    budget_deadline = time.monotonic() + RETRY_BUDGET
+    delays = poll_intervals(RETRY_INITIAL_INTERVAL, RETRY_MAX_INTERVAL, 2.0)
+    attempt = 0
+    while True:
+        waited = time.perf_counter()
+        admitted = limiter.acquire(timeout=READ_TIMEOUT)
+        waited = time.perf_counter() - waited
+        telemetry.observe("dbt_sl_queue_wait_seconds", waited, queue="rate_limit")
+        request_span.add("rate_limit_wait_seconds", waited)
+        if not admitted:
+            raise ServiceUnavailableError("Semantic Layer rate limit exceeded for this tenant")
+        if not breaker.allow():
+            request_span.set(breaker="open")
+            raise ServiceUnavailableError(
+                "The Semantic Layer is currently unavailable. Please try again shortly."
+            )
+
+        error = None
+        retry_after = None
+        started = time.monotonic()
+        try:
+            with telemetry.span("sl.http", attempt=attempt + 1, streamed=stream) as http_span:
+                r = session.post(
+                    url,
+                    json=payload,
+                    headers={"x-dbt-partner-source": source or "streamlit"},
+                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                    stream=stream,
+                )
+                http_span.set(status_code=r.status_code)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if mutation and not _connect_failed(e):
+                # The server may have accepted it; retrying could run it twice
+                breaker.record_failure()
+                logger.warning("GraphQL mutation error url=%s error=%s", url, e)
+                request_span.set(attempts=attempt + 1)
+                telemetry.count(
+                    "dbt_sl_requests_total", operation=operation, status=type(e).__name__
+                )
+                raise ServiceUnavailableError(f"Unable to reach the Semantic Layer: {e}") from e
+            breaker.record_failure()
+            error = e
+            logger.warning("GraphQL request error url=%s error=%s", url, e)
+        except requests.RequestException as e:
+            # Not worth retrying, but it must still end a half-open trial
+            breaker.record_failure()
+            logger.warning("GraphQL request error url=%s error=%s", url, e)
+            request_span.set(attempts=attempt + 1)
+            telemetry.count("dbt_sl_requests_total", operation=operation, status=type(e).__name__)
+            raise ServiceUnavailableError(f"Semantic Layer request failed: {e}") from e
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            request_span.set(request_bytes=len(r.request.body or b""))
+            if r.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if r.status_code not in retryable:
+                break
+            retry_after = _retry_after(r)
+
+        attempt += 1
+        delay = retry_after if retry_after is not None else next(delays)
+        if attempt > MAX_RETRIES or time.monotonic() + delay > budget_deadline:
+            if error is not None:
+                request_span.set(attempts=attempt)
+                telemetry.count(
+                    "dbt_sl_requests_total", operation=operation, status=type(error).__name__
+                )
+                raise ServiceUnavailableError(
+                    f"Unable to reach the Semantic Layer: {error}"
+                ) from error
+            break
+        logger.warning(
+            "Retrying GraphQL request url=%s attempt=%s delay=%.2fs",
+            url,
+            attempt,
+            delay,
+        )
+        request_span.event(
+            "retry",
+            attempt=attempt,
+            delay=delay,
+            status_code=None if error is not None else r.status_code,
+            error=type(error).__name__ if error is not None else None,
+        )
+        telemetry.count("dbt_sl_request_retries_total", operation=operation)
+        if error is None:
+            r.close()
+        time.sleep(delay)
+
     logger.info("Received response status=%s ok=%s", r.status_code, r.ok)
+    request_span.set(status_code=r.status_code, attempts=attempt + 1)
+    telemetry.count("dbt_sl_requests_total", operation=operation, status=r.status_code)
     if not r.ok:
         logger.error(
             "GraphQL request failed status=%s body=%s",
             r.status_code,
             r.text[:500],
         )
-    return r.json()
+    if cassette is not None:
+        body = r.content
+        request_span.set(response_bytes=len(body))
+        cassette.record(url, payload, r.status_code, body, time.monotonic() - started)
+        return _decode_body(body, stream and r.ok, f"HTTP {r.status_code} from {host}")
+    if stream and r.ok:
+        # The body is read while it is decoded; `metered` splits the two
+        with r, telemetry.span("sl.decode", streamed=True) as decode_span:
+            try:
+                json = decode_json_stream(
+                    telemetry.metered(r.iter_content(chunk_size=STREAM_CHUNK_SIZE), decode_span)
+                )
+            except ValueError:
+                # Not JSON, or cut short; reported like the non-streamed path
+                json = {"data": None, "errors": [{"message": f"HTTP {r.status_code} from {host}"}]}
+            except requests.RequestException as e:
+                raise ServiceUnavailableError(
+                    f"Unable to read the Semantic Layer response: {e}"
+                ) from e
+        download = decode_span.attributes.get("download_seconds", 0.0)
+        telemetry.observe("dbt_sl_transfer_seconds", download, phase="download")
+        telemetry.observe(
+            "dbt_sl_transfer_seconds", decode_span.duration - download, phase="decode"
+        )
+        request_span.set(response_bytes=decode_span.attributes.get("response_bytes", 0))
+        return json
+    request_span.set(response_bytes=len(r.content))
+    with telemetry.span("sl.decode", response_bytes=len(r.content), streamed=False) as decode_span:
+        try:
+            json = r.json()
+        except ValueError:
+            json = {"data": None, "errors": [{"message": f"HTTP {r.status_code} from {host}"}]}
+    telemetry.observe("dbt_sl_transfer_seconds", decode_span.duration, phase="decode")
+    return json
 
 
 @st.cache_data
@@ -237,7 +601,9 @@ def get_connection_attributes(uri):
         st.error("Token is missing from the JDBC URL.")
         logger.error("Token missing from JDBC URL; cannot create connection attributes")
     else:
-        host = parsed.path.replace("arrow-flight-sql", "https").replace(":443", "")
+        host = API_URL or parsed.path.replace("arrow-flight-sql", "https").replace(
+            ":443", ""
+        )
         auth_header = f"Bearer {token}"
         conn_attr = ConnAttr(host=host, params=params, auth_header=auth_header)
         logger.info(
@@ -249,68 +615,831 @@ def get_connection_attributes(uri):
         return conn_attr
 
 
-@st.cache_data(show_spinner=False)
-def get_query_results(
-    payload: Dict,
-    source: str = None,
-    key: str = "createQuery",
-    progress: bool = True,
-    conn: ConnAttr = None,
-):
-    conn = conn or st.session_state.conn
-    if progress:
-        progress_bar = st.progress(0, "Submitting Query ... ")
-    json = submit_request(conn, payload, source=source)
+def tenant_key(conn: ConnAttr) -> str:
+    """Identify the tenant behind a connection without exposing its token."""
+    token_hash = hashlib.sha256(conn.auth_header.encode("utf-8")).hexdigest()[:16]
+    return f"{conn.host}|{conn.params.get('environmentid')}|{token_hash}"
+
+
+def payload_fingerprint(payload: Dict) -> str:
+    """
+    Serialize a raw GraphQL payload deterministically for use as a cache key.
+
+    Prefer ``Query.fingerprint`` where a ``Query`` is available.
+    """
+    variables = {
+        k: v for k, v in (payload.get("variables") or {}).items() if k != "environmentId"
+    }
+    return json.dumps(
+        {"query": payload.get("query"), "variables": variables},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def _arrow_table(arrow_result) -> pa.Table:
+    if isinstance(arrow_result, pa.Table):
+        return arrow_result
+    with pa.ipc.open_stream(base64.b64decode(arrow_result)) as reader:
+        return pa.Table.from_batches(reader, reader.schema)
+
+
+def _cache_results(
+    cache_id: str, data: Dict, query: Optional[Query] = None, tenant: str = None
+) -> Dict:
+    """
+    Store a successful result in the result cache and decode it once.
+
+    With ``query`` and ``tenant`` the entry is also indexed so related
+    queries can later be derived from it.
+    """
+    arrow_result = data.get("arrowResult")
+    if arrow_result is None or (isinstance(arrow_result, str) and not arrow_result):
+        return data
+    table = _arrow_table(arrow_result)
+    get_result_cache().put(cache_id, table, data.get("sql"))
+    if query is not None and tenant is not None:
+        get_result_index().add(tenant, cache_id, query)
+    return {**data, "arrowResult": table}
+
+
+def _align_columns(table: pa.Table, query: Query) -> pa.Table:
+    """
+    Reorder metric and dimension columns to the order ``query`` asked for.
+
+    Equivalent queries share cache entries regardless of list order, so a
+    cached table may list its metrics or dimensions in a different order.
+    Metric columns are permuted among metric positions and dimension columns
+    among dimension positions.
+    """
+    columns = table.column_names
+    lowered = [c.lower() for c in columns]
+    aligned = list(columns)
+    for names in (query.metric_names, query.dimension_names):
+        wanted = [n.lower() for n in names]
+        slots = [i for i, c in enumerate(lowered) if c in wanted]
+        ordered = sorted(slots, key=lambda i: wanted.index(lowered[i]))
+        for slot, i in zip(slots, ordered):
+            aligned[slot] = columns[i]
+    return table if aligned == columns else table.select(aligned)
+
+
+def _cached_results(cache_id: str, query: Optional[Query] = None) -> Optional[Dict]:
+    cached = get_result_cache().get(cache_id)
+    telemetry.count(
+        "dbt_sl_result_cache_lookups_total", result="miss" if cached is None else "hit"
+    )
+    if cached is None:
+        return None
+    table, sql = cached
+    if query is not None:
+        table = _align_columns(table, query)
+    logger.info("Result cache hit key=%s rows=%s", cache_id[:12], table.num_rows)
+    return {"arrowResult": table, "sql": sql, "status": "SUCCESSFUL", "error": None}
+
+
+def _metric_catalog() -> Mapping[str, Dict]:
+    catalog = st.session_state.get("catalog")
+    return catalog.metrics if catalog is not None else {}
+
+
+def _derived_results(tenant: str, cache_id: str, query: Query) -> Optional[Dict]:
+    """
+    Compute ``query`` from a cached result of a related query, if one exists.
+
+    A result at a finer grain or with more dimensions is rolled up locally
+    when every metric can be re-aggregated according to its ``measures.agg``
+    in the metric catalog.  A result over a wider time range is filtered
+    down locally when it is grouped at or below the range's grain.
+    The derived table is cached under ``cache_id`` for the next caller.
+    """
+    index = get_result_index()
+    metric_dict = _metric_catalog()
+    aggregations = reaggregations(metric_dict, query.metric_names)
+    for source_id, source in index.sources(tenant, query):
+        if source_id == cache_id or not derivable(source, query, aggregations, metric_dict):
+            continue
+        cached = get_result_cache().get(source_id)
+        if cached is None:
+            index.discard(source_id)
+            continue
+        table, sql = cached
+        try:
+            with telemetry.span("derive_result", source_rows=table.num_rows) as derive_span:
+                table = derive(table, source, query, aggregations)
+                derive_span.set(rows=table.num_rows)
+        except (KeyError, pa.ArrowException) as e:
+            logger.warning("Could not derive result key=%s error=%s", cache_id[:12], e)
+            continue
+        sql = f"-- Derived locally from the cached result of:\n{sql}" if sql else None
+        get_result_cache().put(cache_id, table, sql)
+        index.add(tenant, cache_id, query)
+        telemetry.count("dbt_sl_result_cache_lookups_total", result="derived")
+        logger.info(
+            "Derived result key=%s from key=%s rows=%s",
+            cache_id[:12],
+            source_id[:12],
+            table.num_rows,
+        )
+        return {
+            "arrowResult": _align_columns(table, query),
+            "sql": sql,
+            "status": "SUCCESSFUL",
+            "error": None,
+        }
+    return None
+
+
+def _lookup_results(tenant: str, cache_id: str, query: Optional[Query]) -> Optional[Dict]:
+    """Serve a query from the result cache, directly or derived from a related entry."""
+    cached = _cached_results(cache_id, query)
+    if query is None:
+        return cached
+    if cached is not None:
+        get_result_index().add(tenant, cache_id, query)
+        return cached
+    return _derived_results(tenant, cache_id, query)
+
+
+def _num_rows(data: Dict) -> int:
+    arrow_result = data.get("arrowResult") if isinstance(data, dict) else None
+    return arrow_result.num_rows if isinstance(arrow_result, pa.Table) else 0
+
+
+def _graphql_error(json: Dict) -> str:
     try:
-        query_id = json["data"][key]["queryId"]
-    except TypeError:
-        if progress:
-            progress_bar.progress(80, "Query Failed!")
-        error_msg = json.get("errors", [{}])[0].get("message", "Unknown error")
-        logger.error("GraphQL create query failed response=%s", json)
-        st.error(error_msg)
-        st.stop()
+        return json.get("errors", [{}])[0].get("message", "Unknown error")
+    except (AttributeError, IndexError):
+        return "Unknown error"
+
+
+def poll_intervals(
+    initial: float = POLL_INITIAL_INTERVAL,
+    maximum: float = POLL_MAX_INTERVAL,
+    factor: float = POLL_BACKOFF_FACTOR,
+) -> Iterator[float]:
+    """Yield exponentially growing sleep intervals with full jitter."""
+    ceiling = initial
     while True:
-        graphql_query = GRAPHQL_QUERIES["get_results"]
-        results_payload = {"variables": {"queryId": query_id}, "query": graphql_query}
-        json = submit_request(conn, results_payload)
+        yield random.uniform(initial / 2, ceiling)
+        ceiling = min(ceiling * factor, maximum)
+
+
+def create_query(
+    conn: ConnAttr, payload: Dict, source: str = None, key: str = "createQuery"
+) -> str:
+    """Submit a create mutation and return the resulting query id."""
+    with telemetry.span("sl.create_query") as create_span:
+        json = submit_request(conn, payload, source=source)
+        try:
+            query_id = json["data"][key]["queryId"]
+        except (KeyError, TypeError):
+            logger.error("GraphQL create query failed response=%s", json)
+            raise QueryError(_graphql_error(json))
+        create_span.set(query_id=query_id)
+    return query_id
+
+
+def wait_for_query(
+    conn: ConnAttr,
+    query_id: str,
+    timeout: float = QUERY_TIMEOUT,
+    on_status: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Poll a query with a status-only document until it reaches a final state.
+
+    The interval between polls backs off exponentially with jitter and is reset
+    whenever the status changes, so short queries return quickly while long
+    ones stop hammering the API.
+
+    Args:
+        conn: Connection attributes for the tenant
+        query_id: Id returned by the create mutation
+        timeout: Seconds to wait before giving up on the query
+        on_status: Optional callback invoked with each new status
+    """
+    deadline = time.monotonic() + timeout
+    payload = {
+        "variables": {"queryId": query_id},
+        "query": GRAPHQL_QUERIES["get_status"],
+    }
+    intervals = poll_intervals()
+    last_status = None
+    with telemetry.span("sl.wait", query_id=query_id) as wait_span:
+        for poll in itertools.count(1):
+            json = submit_request(conn, payload)
+            try:
+                data = json["data"]["query"]
+                status = data["status"].lower()
+            except (KeyError, TypeError, AttributeError):
+                logger.error(
+                    "GraphQL query polling failed query_id=%s response=%s",
+                    query_id,
+                    json,
+                )
+                raise QueryError(_graphql_error(json), query_id=query_id)
+            telemetry.count("dbt_sl_query_polls_total", status=status)
+            wait_span.set(polls=poll, status=status)
+
+            if status != last_status:
+                logger.info("Query status query_id=%s status=%s", query_id, status)
+                wait_span.event("status", status=status, poll=poll)
+                telemetry.count("dbt_sl_query_status_transitions_total", status=status)
+                if on_status:
+                    on_status(status)
+                last_status = status
+                intervals = poll_intervals()
+
+            if status in ("successful", "failed"):
+                return data
+
+            delay = next(intervals)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise QueryTimeoutError(
+                    f"Query did not finish within {timeout:.0f} seconds",
+                    query_id=query_id,
+                )
+            time.sleep(min(delay, remaining))
+
+
+def fetch_query_results(conn: ConnAttr, query_id: str) -> Dict:
+    """Download the Arrow result and compiled SQL of a finished query."""
+    payload = {
+        "variables": {"queryId": query_id},
+        "query": GRAPHQL_QUERIES["get_results"],
+    }
+    with telemetry.span("sl.fetch_results", query_id=query_id) as fetch_span:
+        json = submit_request(conn, payload, stream=True)
         try:
             data = json["data"]["query"]
-        except TypeError:
-            if progress:
-                progress_bar.progress(80, "Query Failed!")
-            error_msg = json.get("errors", [{}])[0].get("message", "Unknown error")
+        except (KeyError, TypeError):
             logger.error(
-                "GraphQL query polling failed query_id=%s response=%s",
+                "GraphQL result download failed query_id=%s response=%s",
                 query_id,
                 json,
             )
-            st.error(error_msg)
-            st.stop()
+            raise QueryError(_graphql_error(json), query_id=query_id)
+        rows = _num_rows(data)
+        fetch_span.set(rows=rows)
+    telemetry.count("dbt_sl_result_rows_total", rows, step="fetch_results")
+    return data
+
+
+def execute_query(
+    conn: ConnAttr,
+    payload: Dict,
+    source: str = None,
+    key: str = "createQuery",
+    timeout: float = QUERY_TIMEOUT,
+    on_status: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Create a query, wait for it to finish and return its results.
+
+    Raises:
+        QueryError: If the query cannot be created or fails
+        QueryTimeoutError: If the query does not finish before ``timeout``
+    """
+    query_id = create_query(conn, payload, source=source, key=key)
+    data = wait_for_query(conn, query_id, timeout=timeout, on_status=on_status)
+    if data["status"].lower() == "failed":
+        logger.error(
+            "Semantic Layer query failed query_id=%s error=%s",
+            query_id,
+            data.get("error"),
+        )
+        raise QueryError(data.get("error") or "Query failed", query_id=query_id)
+    return fetch_query_results(conn, query_id)
+
+
+def execute_queries(
+    conn: ConnAttr,
+    queries: Sequence[Query],
+    source: str = None,
+    timeout: float = QUERY_TIMEOUT,
+    max_workers: int = MAX_CONCURRENT_QUERIES,
+) -> Iterator[Tuple[int, Union[Dict, QueryError]]]:
+    """
+    Run several queries concurrently and yield results as each one finishes.
+
+    Every query is created and polled on its own worker thread, so the wall
+    time is roughly that of the slowest query rather than the sum of all of
+    them.  Failures do not cancel the remaining queries.
+
+    Args:
+        conn: Connection attributes for the tenant
+        queries: Queries to execute
+        source: Value for the x-dbt-partner-source header
+        timeout: Per-query deadline in seconds
+        max_workers: Maximum number of queries in flight at once
+
+    Yields:
+        Tuples of ``(index, result)`` where ``index`` is the position of the
+        query in ``queries`` and ``result`` is either the results payload or
+        the ``QueryError`` the query raised.
+    """
+    if not queries:
+        return
+
+    workers = max(1, min(max_workers, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sl-query") as pool:
+        # Each worker runs in a copy of this context so its spans nest under ours
+        futures = {
+            pool.submit(
+                copy_context().run,
+                execute_query,
+                conn,
+                {"query": query.gql, "variables": query.variables},
+                source=source,
+                timeout=timeout,
+            ): i
+            for i, query in enumerate(queries)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield i, future.result()
+            except QueryError as e:
+                yield i, e
+
+
+def _batch_errors(json: Dict) -> Dict[Optional[str], str]:
+    """Map GraphQL errors to the field alias they were raised for."""
+    errors: Dict[Optional[str], str] = {}
+    for error in json.get("errors") or []:
+        path = error.get("path") or [None]
+        errors.setdefault(path[0], error.get("message", "Unknown error"))
+    return errors
+
+
+def create_queries(
+    conn: ConnAttr, queries: Sequence[Query], source: str = None
+) -> list:
+    """
+    Create several queries with a single aliased createQuery mutation.
+
+    Returns:
+        One entry per query, either its query id or a ``QueryError``
+    """
+    document, variables = batch_gql(queries)
+    with telemetry.span("sl.create_query", queries=len(queries)):
+        json = submit_request(conn, {"query": document, "variables": variables}, source=source)
+    data = json.get("data") or {}
+    errors = _batch_errors(json)
+    created = []
+    for i in range(len(queries)):
+        alias = f"q{i}"
+        try:
+            created.append(data[alias]["queryId"])
+        except (KeyError, TypeError):
+            message = errors.get(alias) or errors.get(None) or "Unknown error"
+            created.append(QueryError(message))
+    return created
+
+
+def batch_query_fields(
+    conn: ConnAttr,
+    query_ids: Sequence[str],
+    fields: Sequence[str] = STATUS_FIELDS,
+    operation: str = "GetStatuses",
+) -> Dict[str, Union[Dict, QueryError]]:
+    """
+    Fetch ``fields`` for several query ids with one aliased GraphQL request.
+
+    Returns:
+        A mapping of query id to its data or a ``QueryError``
+    """
+    arguments = {"environmentId": "BigInt!"}
+    variables = {}
+    rendered = []
+    for i, query_id in enumerate(query_ids):
+        alias = f"q{i}"
+        arguments[f"{alias}QueryId"] = "String!"
+        variables[f"{alias}QueryId"] = query_id
+        rendered.append(
+            GRAPHQL_QUERIES["query_field"].format(
+                alias=alias, selection="\n    ".join(fields)
+            )
+        )
+    document = GRAPHQL_QUERIES["query_batch"].format(
+        operation=operation,
+        arguments=", ".join(f"${k}: {v}" for k, v in arguments.items()),
+        fields="\n".join(rendered),
+    )
+    json = submit_request(
+        conn,
+        {"query": document, "variables": variables},
+        stream="arrowResult" in fields,
+    )
+    data = json.get("data") or {}
+    errors = _batch_errors(json)
+    results: Dict[str, Union[Dict, QueryError]] = {}
+    for i, query_id in enumerate(query_ids):
+        alias = f"q{i}"
+        if data.get(alias):
+            results[query_id] = data[alias]
         else:
+            message = errors.get(alias) or errors.get(None) or "Unknown error"
+            results[query_id] = QueryError(message, query_id=query_id)
+    return results
+
+
+def execute_query_batch(
+    conn: ConnAttr,
+    queries: Sequence[Query],
+    source: str = None,
+    timeout: float = QUERY_TIMEOUT,
+) -> Iterator[Tuple[int, Union[Dict, QueryError]]]:
+    """
+    Run several queries using multiplexed GraphQL documents.
+
+    All queries are created with one request, every poll checks all pending
+    queries with one status-only request, and queries that finish together
+    have their results downloaded with one request.  Results are yielded with
+    the same ``(index, result)`` contract as ``execute_queries``.
+    """
+    if not queries:
+        return
+
+    deadline = time.monotonic() + timeout
+    pending: Dict[str, int] = {}
+    for i, created in enumerate(create_queries(conn, queries, source=source)):
+        if isinstance(created, QueryError):
+            yield i, created
+        else:
+            pending[created] = i
+
+    intervals = poll_intervals()
+    last_status: Dict[str, str] = {}
+    while pending:
+        finished = []
+        for query_id, data in batch_query_fields(conn, list(pending)).items():
+            if isinstance(data, QueryError):
+                yield pending.pop(query_id), data
+                continue
             status = data["status"].lower()
-            if status == "successful":
-                if progress:
-                    progress_bar.progress(100, "Query Successful!")
-                break
-            elif status == "failed":
-                if progress:
-                    progress_bar.progress(
-                        (RESULT_STATUSES.index(status) + 1) * 20, "red:Query Failed!"
-                    )
+            telemetry.count("dbt_sl_query_polls_total", status=status)
+            if last_status.get(query_id) != status:
+                last_status[query_id] = status
+                telemetry.count("dbt_sl_query_status_transitions_total", status=status)
+                intervals = poll_intervals()
+            if status == "failed":
                 logger.error(
-                    "Semantic Layer query failed query_id=%s error=%s sql=%s",
+                    "Semantic Layer query failed query_id=%s error=%s",
                     query_id,
                     data.get("error"),
-                    data.get("sql"),
                 )
-                st.error(data["error"])
-                st.stop()
+                yield pending.pop(query_id), QueryError(
+                    data.get("error") or "Query failed", query_id=query_id
+                )
+            elif status == "successful":
+                finished.append(query_id)
+
+        if finished:
+            with telemetry.span("sl.fetch_results", queries=len(finished)) as fetch_span:
+                results = batch_query_fields(
+                    conn, finished, fields=RESULT_FIELDS, operation="GetBatchResults"
+                )
+                rows = sum(_num_rows(data) for data in results.values())
+                fetch_span.set(rows=rows)
+            telemetry.count("dbt_sl_result_rows_total", rows, step="fetch_results")
+            for query_id, data in results.items():
+                yield pending.pop(query_id), data
+
+        if not pending:
+            break
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            for query_id, i in pending.items():
+                yield i, QueryTimeoutError(
+                    f"Query did not finish within {timeout:.0f} seconds",
+                    query_id=query_id,
+                )
+            return
+        time.sleep(min(next(intervals), remaining))
+
+
+class SingleFlight:
+    """
+    Collapse concurrent executions of the same key into one.
+
+    The first caller to ``claim`` a key becomes its leader and must
+    ``resolve`` it; later callers receive the leader's future and wait on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """Return the future for ``key`` and whether the caller is its leader."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def resolve(self, key: str, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            future = self._calls.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable, *args, **kwargs):
+        """Run ``fn`` once for all concurrent callers sharing ``key``."""
+        future, leader = self.claim(key)
+        if not leader:
+            logger.info("Waiting on in-flight query key=%s", key[:12])
+            try:
+                return future.result(timeout=QUERY_TIMEOUT)
+            except FutureTimeoutError:
+                raise QueryTimeoutError("Timed out waiting for an in-flight query")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.resolve(key, error=e)
+            raise
+        except BaseException:
+            # Streamlit's rerun and stop exceptions carry this session's state
+            # and must not be raised in the waiting sessions
+            self.resolve(key, error=QueryError("Query was abandoned by its leader"))
+            raise
+        self.resolve(key, result=result)
+        return result
+
+
+# Process-wide registry of queries currently executing, keyed by cache key
+_in_flight = SingleFlight()
+
+
+@contextmanager
+def _admitted(conn: ConnAttr, priority: Priority, weight: int = 1) -> Iterator[float]:
+    """Wait for the process-wide scheduler to admit work for this tenant."""
+    try:
+        with get_scheduler().slot(
+            tenant_key(conn), priority, weight=weight, timeout=QUERY_TIMEOUT
+        ) as waited:
+            telemetry.observe("dbt_sl_queue_wait_seconds", waited, queue="scheduler")
+            current = telemetry.current_span()
+            if current is not None:
+                current.set(queue_wait_seconds=waited)
+            yield waited
+    except AdmissionTimeout as e:
+        raise ServiceUnavailableError(
+            "The portal is busy running other queries. Please try again shortly."
+        ) from e
+
+
+def _plan(
+    queries: Sequence[Query], cube: bool, aggregations: Dict, metric_dict: Mapping[str, Dict]
+) -> List[PlannedQuery]:
+    """
+    Plan ``queries`` as cube queries where allowed and possible, else merge them.
+
+    With ``cube``, the queries whose metrics share a row domain are answered
+    from one cube query per domain; the rest are merged as usual.
+    """
+    planned: List[PlannedQuery] = []
+    rest = list(range(len(queries)))
+    if cube and len(queries) > 1:
+        domains: Dict[Tuple, List[int]] = {}
+        rest = []
+        for i, query in enumerate(queries):
+            domain = row_domain(metric_dict, query.metric_names)
+            if domain is None:
+                rest.append(i)
+            else:
+                domains.setdefault(domain, []).append(i)
+        for members in domains.values():
+            candidate = cube_query([queries[i] for i in members]) if len(members) > 1 else None
+            if candidate is not None and all(
+                derivable(candidate, queries[i], aggregations, metric_dict) for i in members
+            ):
+                logger.info(
+                    "Answering %s queries from one cube dimensions=%s",
+                    len(members),
+                    candidate.dimension_names,
+                )
+                planned.append(PlannedQuery(candidate, members))
+            else:
+                rest.extend(members)
+        rest.sort()
+    for plan in plan_queries([queries[i] for i in rest], metric_dict):
+        planned.append(PlannedQuery(plan.query, [rest[k] for k in plan.members]))
+    return planned
+
+
+def _derived_answer(
+    data: Dict, source: Query, query: Query, aggregations: Dict
+) -> Union[Dict, QueryError]:
+    """Compute ``query``'s results from those of the planned query that answers it."""
+    table = data.get("arrowResult")
+    if not isinstance(table, pa.Table):
+        return data
+    try:
+        table = derive(table, source, query, aggregations)
+    except (KeyError, pa.ArrowException) as e:
+        logger.error("Could not derive planned result error=%s", e)
+        return QueryError(f"Could not derive the result locally: {e}")
+    return {**data, "arrowResult": _align_columns(table, query)}
+
+
+def _shared(data: Union[Dict, QueryError], query: Optional[Query]) -> Union[Dict, QueryError]:
+    """Adapt a result produced for another caller of the same query."""
+    if isinstance(data, QueryError):
+        return data
+    data = dict(data)
+    if query is not None and isinstance(data.get("arrowResult"), pa.Table):
+        data["arrowResult"] = _align_columns(data["arrowResult"], query)
+    return data
+
+
+def execute_cached_queries(
+    conn: ConnAttr,
+    queries: Sequence[Query],
+    source: str = None,
+    executor: Callable[..., Iterator[Tuple[int, Union[Dict, pa.Table, QueryError]]]] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    cube: bool = False,
+) -> Iterator[Tuple[int, Union[Dict, QueryError]]]:
+    """
+    Serve queries from the result cache and execute only the misses.
+
+    Misses that share ``groupBy``, ``where`` and grain are merged into one
+    multi-metric query (see ``planner.plan_queries``), run together with
+    ``executor`` (``execute_query_batch`` by default), split back per query
+    and written back to the cache.  With ``cube=True``, misses with the same
+    filters are instead answered from one query over the union of their
+    metrics and dimensions (``rollup.cube_query``) when every metric can be
+    re-aggregated; use it only where the filters keep that result small,
+    e.g. to a single member.  A miss that another caller is
+    already executing is not re-run; its result is shared once ready.
+    Executing the misses takes one scheduler slot per executed query at
+    ``priority``; the slots are released before their results are yielded.
+    Successful results carry a decoded ``pyarrow.Table`` under
+    ``arrowResult``.
+    """
+    executor = executor or execute_query_batch
+    tenant = tenant_key(conn)
+    cache_ids = [cache_key(tenant, q.fingerprint) for q in queries]
+    misses = []
+    waiting: Dict[Future, int] = {}
+    # Keys this call leads and has not resolved yet
+    pending = set()
+    try:
+        for i, cache_id in enumerate(cache_ids):
+            cached = _lookup_results(tenant, cache_id, queries[i])
+            if cached is not None:
+                yield i, cached
+                continue
+            future, leader = _in_flight.claim(cache_id)
+            if not leader:
+                waiting[future] = i
+                continue
+            pending.add(i)
+            # Another leader may have finished between the cache check and the claim
+            cached = _lookup_results(tenant, cache_id, queries[i])
+            if cached is not None:
+                pending.discard(i)
+                _in_flight.resolve(cache_id, result=cached)
+                yield i, cached
             else:
-                if progress:
+                misses.append(i)
+
+        if misses:
+            metric_dict = _metric_catalog()
+            aggregations = reaggregations(
+                metric_dict, {m for i in misses for m in queries[i].metric_names}
+            )
+            plan = _plan([queries[i] for i in misses], cube, aggregations, metric_dict)
+            answers = []
+            # Slots are held only while executing, not while the caller
+            # renders between yields
+            with _admitted(conn, priority, weight=len(plan)):
+                results = executor(conn, [p.query for p in plan], source=source)
+                for j, result in results:
+                    planned = plan[j]
+                    if isinstance(result, pa.Table):
+                        result = {"arrowResult": result, "sql": None, "status": "SUCCESSFUL"}
+                    if planned.merged and not isinstance(result, QueryError):
+                        # Cached (and decoded) once; later queries may be derived from it too
+                        planned_id = cache_key(tenant, planned.query.fingerprint)
+                        result = _cache_results(planned_id, result, planned.query, tenant)
+                    for k in planned.members:
+                        i = misses[k]
+                        answer = result
+                        if planned.merged and not isinstance(answer, QueryError):
+                            answer = _derived_answer(
+                                answer, planned.query, queries[i], aggregations
+                            )
+                        if not isinstance(answer, QueryError):
+                            answer = _cache_results(cache_ids[i], answer, queries[i], tenant)
+                        pending.discard(i)
+                        _in_flight.resolve(cache_ids[i], result=answer)
+                        answers.append((i, answer))
+            yield from answers
+    finally:
+        for i in pending:
+            _in_flight.resolve(
+                cache_ids[i], error=QueryError("Query was abandoned by its leader")
+            )
+
+    done = set()
+    try:
+        for future in as_completed(waiting, timeout=QUERY_TIMEOUT):
+            done.add(future)
+            i = waiting[future]
+            try:
+                yield i, _shared(future.result(), queries[i])
+            except QueryError as e:
+                yield i, e
+    except FutureTimeoutError:
+        for future, i in waiting.items():
+            if future not in done:
+                yield i, QueryTimeoutError("Timed out waiting for an in-flight query")
+
+
+def get_query_results(
+    payload: Union[Dict, Query],
+    source: str = None,
+    key: str = "createQuery",
+    progress: bool = True,
+    conn: ConnAttr = None,
+    priority: Priority = Priority.INTERACTIVE,
+):
+    """
+    Execute a query, showing progress and stopping the script on error.
+
+    ``payload`` is either a ``Query`` or a raw GraphQL payload.  Queries are
+    cached under their canonical fingerprint, so logically identical queries
+    share results; raw payloads are cached under their serialized form.
+    Results are served from the shared result cache when possible, and
+    concurrent callers asking for the same query on the same tenant share a
+    single execution.  Executions wait for a slot from the process-wide
+    scheduler at ``priority``.  The returned ``arrowResult`` is a decoded
+    ``pyarrow.Table``.
+    """
+    conn = conn or st.session_state.conn
+    query = None
+    if isinstance(payload, Query):
+        query = payload
+        payload = {"query": query.gql, "variables": query.variables}
+        fingerprint = query.fingerprint
+    else:
+        fingerprint = payload_fingerprint(payload)
+    tenant = tenant_key(conn)
+    cache_id = cache_key(tenant, fingerprint)
+    with telemetry.span(
+        "sl.get_query_results", operation=_operation_name(payload)
+    ) as query_span:
+        cached = _lookup_results(tenant, cache_id, query)
+        if cached is not None:
+            query_span.set(cache="hit", rows=_num_rows(cached))
+            return cached
+        # Callers that wait on another session's execution keep "shared"
+        query_span.set(cache="shared")
+
+        on_status = None
+        if progress:
+            progress_bar = st.progress(0, "Submitting Query ... ")
+
+            def on_status(status: str) -> None:
+                if status == "successful":
+                    progress_bar.progress(100, "Query Successful!")
+                elif status in RESULT_STATUSES:
                     progress_bar.progress(
                         (RESULT_STATUSES.index(status) + 1) * 20,
                         f"Query is {status.capitalize()}...",
                     )
 
-    return data
+        def run() -> Dict:
+            # Re-check: an identical query may have finished while we waited to lead
+            cached = _lookup_results(tenant, cache_id, query)
+            if cached is not None:
+                return cached
+            query_span.set(cache="miss")
+            with _admitted(conn, priority):
+                data = execute_query(
+                    conn, payload, source=source, key=key, on_status=on_status
+                )
+            return _cache_results(cache_id, data, query, tenant)
+
+        try:
+            data = _shared(_in_flight.do(cache_id, run), query)
+        except QueryError as e:
+            query_span.set(error=type(e).__name__)
+            if progress:
+                progress_bar.progress(80, "Query Failed!")
+            st.error(str(e))
+            st.stop()
+        query_span.set(rows=_num_rows(data))
+        return data
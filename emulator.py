@@ -0,0 +1,649 @@
+"""
+Local stand-in for the dbt Semantic Layer GraphQL API.
+
+Implements the subset of the API the portal uses (``GetMetrics``,
+``CreateQuery``, ``GetResults``, ``GetDimensionValues`` and
+``GetSavedQueries``, plus the batched and status-only variants in
+``queries.GRAPHQL_QUERIES``) and computes real results with DuckDB over
+``data/members.csv`` (or a larger ``synthetic_data`` roster) and generated
+claims.  Results are returned as base64 Arrow IPC streams, exactly like the
+real service.
+
+Run it with ``python emulator.py --port 8787`` and point the portal at it
+with ``DBT_SL_API_URL=http://localhost:8787``.
+"""
+
+# stdlib
+import argparse
+import base64
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# third party
+import pyarrow as pa
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# first party
+from synthetic_data import generate_claims, load_base_members, load_dataset, scale_members
+
+
+logger = logging.getLogger(__name__)
+
+GRAINS = ["DAY", "WEEK", "MONTH", "QUARTER", "YEAR"]
+# Queries remembered for status and result requests; the least recently used
+# are forgotten beyond this, so long load tests run in bounded memory
+MAX_JOBS = 10_000
+
+# Qualified dimension name -> (SQL expression, type)
+DIMENSIONS = {
+    "metric_time": ("c.claim_date", "TIME"),
+    "claim__claim_date": ("c.claim_date", "TIME"),
+    "claim__paid_date": ("c.paid_date", "TIME"),
+    "claim__claim_type": ("c.claim_type", "CATEGORICAL"),
+    "claim__claim_status": ("c.claim_status", "CATEGORICAL"),
+    "claim__provider_name": ("c.provider_name", "CATEGORICAL"),
+    "claim__company_id": ("c.company_id", "CATEGORICAL"),
+    "member__email": ("m.email", "CATEGORICAL"),
+    "member__company_id": ("m.company_id", "CATEGORICAL"),
+    "member__plan_id": ("m.plan_id", "CATEGORICAL"),
+    "member__department": ("m.department", "CATEGORICAL"),
+    "member__gender": ("m.gender", "CATEGORICAL"),
+}
+ENTITIES = {
+    "claim": ("c.claim_id", "PRIMARY"),
+    "member": ("m.member_id", "FOREIGN"),
+}
+YTD_FILTER = "{{ TimeDimension('metric_time', 'DAY') }} >= date_trunc('year', current_date)"
+# Metric name -> (label, aggregation, measure column, filter template,
+# aggregation time dimension, which ``metric_time`` resolves to)
+METRICS = {
+    "total_claim_amount": ("Total Claim Amount", "SUM", "claim_amount", None, "claim_date"),
+    "total_paid_by_insurance": (
+        "Total Paid by Insurance",
+        "SUM",
+        "paid_by_insurance",
+        None,
+        "claim_date",
+    ),
+    "total_member_responsibility": (
+        "Total Member Responsibility",
+        "SUM",
+        "member_responsibility",
+        None,
+        "claim_date",
+    ),
+    "ytd_member_responsibility": (
+        "YTD Member Responsibility",
+        "SUM",
+        "member_responsibility",
+        YTD_FILTER,
+        "claim_date",
+    ),
+    "total_claims_count": ("Total Claims", "COUNT", "claim_id", None, "claim_date"),
+    "average_claim_amount": ("Average Claim Amount", "AVERAGE", "claim_amount", None, "claim_date"),
+    "insurance_payments": ("Insurance Payments", "SUM", "paid_by_insurance", None, "paid_date"),
+}
+AGG_SQL = {
+    "SUM": "SUM({})",
+    "COUNT": "COUNT({})",
+    "AVERAGE": "AVG({})",
+    "MIN": "MIN({})",
+    "MAX": "MAX({})",
+    "COUNT_DISTINCT": "COUNT(DISTINCT {})",
+}
+SAVED_QUERIES = [
+    {
+        "name": "monthly_claims_by_type",
+        "label": "Monthly claims by type",
+        "description": "Claim volume and cost per claim type each month.",
+        "queryParams": {
+            "metrics": [{"name": "total_claims_count"}, {"name": "total_claim_amount"}],
+            "groupBy": [
+                {"name": "metric_time", "grain": "MONTH"},
+                {"name": "claim__claim_type", "grain": None},
+            ],
+            "where": None,
+        },
+    },
+    {
+        "name": "denied_claims_by_provider",
+        "label": "Denied claims by provider",
+        "description": "Denied claim counts per provider.",
+        "queryParams": {
+            "metrics": [{"name": "total_claims_count"}],
+            "groupBy": [{"name": "claim__provider_name", "grain": None}],
+            "where": {"whereSqlTemplate": "{{ Dimension('claim__claim_status') }} = 'Denied'"},
+        },
+    },
+]
+
+_TEMPLATE = re.compile(
+    r"\{\{\s*(Dimension|TimeDimension|Entity)\(\s*['\"]([^'\"]+)['\"]"
+    r"(?:\s*,\s*['\"]([^'\"]+)['\"])?\s*\)\s*\}\}"
+)
+_OPERATION = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+_TOKEN = re.compile(r"\$?\w+|[{}():\[\]]")
+
+
+class GraphQLError(Exception):
+    """An error reported in the ``errors`` list of a GraphQL response."""
+
+
+class _Field:
+    __slots__ = ("alias", "name", "arguments", "selection")
+
+    def __init__(self, alias, name, arguments, selection):
+        self.alias = alias
+        self.name = name
+        self.arguments = arguments
+        self.selection = selection
+
+
+def parse_document(document: str) -> List[_Field]:
+    """
+    Parse the top-level selection set of a GraphQL operation.
+
+    Only the constructs the portal sends are understood: aliases, arguments
+    bound to variables or simple literals, and nested selections.
+    """
+    tokens = _TOKEN.findall(document)
+    try:
+        start = tokens.index("{")
+    except ValueError:
+        raise GraphQLError("Document has no selection set")
+    fields, _ = _parse_selection(tokens, start)
+    return fields
+
+
+def _parse_selection(tokens: List[str], pos: int) -> Tuple[List[_Field], int]:
+    fields = []
+    pos += 1
+    while tokens[pos] != "}":
+        alias = name = tokens[pos]
+        pos += 1
+        if tokens[pos] == ":":
+            name = tokens[pos + 1]
+            pos += 2
+        arguments = {}
+        if tokens[pos] == "(":
+            pos += 1
+            while tokens[pos] != ")":
+                arguments[tokens[pos]] = tokens[pos + 2]
+                pos += 3
+            pos += 1
+        selection = None
+        if tokens[pos] == "{":
+            selection, pos = _parse_selection(tokens, pos)
+        fields.append(_Field(alias, name, arguments, selection))
+    return fields, pos + 1
+
+
+def _select(value: Any, selection: Optional[List[_Field]]) -> Any:
+    if selection is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [_select(item, selection) for item in value]
+    return {f.alias: _select(value.get(f.name), f.selection) for f in selection}
+
+
+def _dimension_sql(name: str, metric_time: str) -> Tuple[str, str]:
+    if name not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension {name!r}")
+    expr, type = DIMENSIONS[name]
+    return (metric_time if name == "metric_time" else expr), type
+
+
+def render_where(template: str, metric_time: str = "c.claim_date") -> str:
+    """
+    Replace Jinja ``Dimension``/``TimeDimension``/``Entity`` calls with SQL,
+    with ``metric_time`` standing for the metric's aggregation time dimension.
+    """
+
+    def replace(match):
+        kind, name, grain = match.groups()
+        if kind == "Entity":
+            if name not in ENTITIES:
+                raise ValueError(f"Unknown entity {name!r}")
+            return ENTITIES[name][0]
+        expr, type = _dimension_sql(name, metric_time)
+        if type == "TIME":
+            return f"date_trunc('{(grain or 'DAY').lower()}', {expr})::DATE"
+        return expr
+
+    return _TEMPLATE.sub(replace, template)
+
+
+def _column_name(group_by: Dict[str, Any]) -> str:
+    name = group_by["name"]
+    if DIMENSIONS.get(name, (None, None))[1] == "TIME":
+        return f"{name}__{(group_by.get('grain') or 'DAY').lower()}"
+    return name
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _compile_select(
+    metrics: List[Dict[str, Any]],
+    group_by: Optional[List[Dict[str, Any]]],
+    where: Optional[List[Dict[str, Any]]],
+    metric_time: str,
+) -> str:
+    """Compile metrics that share an aggregation time dimension, unordered."""
+    select, group_columns = [], []
+    for item in group_by or []:
+        expr, type = _dimension_sql(item["name"], metric_time)
+        if type == "TIME":
+            grain = (item.get("grain") or "DAY").upper()
+            if grain not in GRAINS:
+                raise ValueError(f"Unsupported grain {grain!r}")
+            expr = f"date_trunc('{grain.lower()}', {expr})::DATE"
+        select.append(f"{expr} AS {_quote(_column_name(item))}")
+        group_columns.append(str(len(select)))
+
+    filters = []
+    for item in metrics:
+        _, agg, column, filter, _ = METRICS[item["name"]]
+        expr = AGG_SQL[agg].format(f"c.{column}")
+        if filter:
+            expr += f" FILTER (WHERE {render_where(filter, metric_time)})"
+        filters.append(filter)
+        select.append(f"{expr} AS {_quote(item['name'])}")
+
+    sql = (
+        f"SELECT {', '.join(select)}\n"
+        "FROM claims AS c\n"
+        "JOIN members AS m ON c.member_id = m.member_id"
+    )
+    if where:
+        sql += "\nWHERE " + " AND ".join(
+            f"({render_where(w['sql'], metric_time)})" for w in where
+        )
+    if group_columns:
+        sql += "\nGROUP BY " + ", ".join(group_columns)
+        # Like MetricFlow, only return groups where some metric has input rows
+        if all(filters):
+            sql += "\nHAVING bool_or(" + " OR ".join(
+                f"({render_where(f, metric_time)})" for f in filters
+            ) + ")"
+    return sql
+
+
+def compile_query(
+    metrics: List[Dict[str, Any]],
+    group_by: Optional[List[Dict[str, Any]]] = None,
+    where: Optional[List[Dict[str, Any]]] = None,
+    order_by: Optional[List[Dict[str, Any]]] = None,
+    limit: Optional[int] = None,
+) -> str:
+    """
+    Compile createQuery inputs to DuckDB SQL over the claims and members tables.
+
+    ``metric_time`` resolves to each metric's aggregation time dimension.
+    Like MetricFlow, metrics with different aggregation time dimensions are
+    computed separately and full outer joined on the group-by columns.
+
+    Raises:
+        ValueError: If a metric or dimension is not defined
+    """
+    if not metrics:
+        raise ValueError("At least one metric is required")
+
+    by_time_dimension: Dict[str, List[Dict[str, Any]]] = {}
+    for item in metrics:
+        if item["name"] not in METRICS:
+            raise ValueError(f"Metric {item['name']!r} not found")
+        by_time_dimension.setdefault(METRICS[item["name"]][4], []).append(item)
+
+    if len(by_time_dimension) == 1:
+        (time_dimension,) = by_time_dimension
+        sql = _compile_select(metrics, group_by, where, f"c.{time_dimension}")
+    else:
+        columns = [_quote(_column_name(item)) for item in group_by or []]
+        parts = [
+            f"({_compile_select(items, group_by, where, f'c.{time_dimension}')}) AS q{n}"
+            for n, (time_dimension, items) in enumerate(by_time_dimension.items())
+        ]
+        sql = f"SELECT {', '.join(columns + [_quote(item['name']) for item in metrics])}\n"
+        sql += f"FROM {parts[0]}"
+        for part in parts[1:]:
+            if columns:
+                sql += f"\nFULL OUTER JOIN {part} USING ({', '.join(columns)})"
+            else:
+                sql += f"\nCROSS JOIN {part}"
+
+    if order_by:
+        terms = []
+        for item in order_by:
+            if item.get("metric"):
+                column = item["metric"]["name"]
+            else:
+                column = _column_name(item["groupBy"])
+            terms.append(_quote(column) + (" DESC" if item.get("descending") else ""))
+        sql += "\nORDER BY " + ", ".join(terms)
+    if limit:
+        sql += f"\nLIMIT {int(limit)}"
+    return sql
+
+
+def compile_dimension_values(group_by: List[Dict[str, Any]]) -> str:
+    """Compile a createDimensionValuesQuery to a DISTINCT query over one dimension."""
+    if len(group_by) != 1 or group_by[0]["name"] not in DIMENSIONS:
+        raise ValueError("Exactly one known dimension is required")
+    expr, _ = DIMENSIONS[group_by[0]["name"]]
+    column = _quote(_column_name(group_by[0]))
+    return (
+        f"SELECT DISTINCT {expr} AS {column}\n"
+        "FROM claims AS c\n"
+        "JOIN members AS m ON c.member_id = m.member_id\n"
+        f"ORDER BY {column}"
+    )
+
+
+def _arrow_result(table: pa.Table) -> str:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+class _Job:
+    def __init__(self, query_id: str, sql: str, future: Future):
+        self.query_id = query_id
+        self.sql = sql
+        self.future = future
+        self.created = time.monotonic()
+
+
+class SemanticLayerEmulator:
+    """
+    Answer Semantic Layer GraphQL requests from an in-process DuckDB database.
+
+    Queries run on a worker pool as soon as they are created.  A query
+    reports ``PENDING``, ``COMPILED`` and ``RUNNING`` until both its work is
+    done and ``latency`` seconds have passed, mimicking warehouse round trips.
+    Only the ``max_jobs`` most recently used queries are kept.
+    """
+
+    def __init__(
+        self,
+        members: pa.Table = None,
+        claims: pa.Table = None,
+        latency: float = 0.0,
+        max_workers: int = 4,
+        seed: int = 0,
+        max_jobs: int = MAX_JOBS,
+    ):
+        if duckdb is None:
+            raise ImportError("The emulator requires duckdb; install it with `pip install duckdb`")
+        members = load_base_members() if members is None else members
+        claims = generate_claims(members, seed=seed) if claims is None else claims
+        if "paid_date" not in claims.column_names:
+            # Datasets written before claims carried a paid date
+            claims = claims.append_column("paid_date", pa.nulls(claims.num_rows, pa.date32()))
+        self.latency = latency
+        self.members = members
+        self._db = duckdb.connect()
+        # Registered Arrow views are connection-local; materialize them so the
+        # worker cursors can see them
+        for name, table in (("members", members), ("claims", claims)):
+            self._db.register(f"{name}_arrow", table)
+            self._db.execute(f"CREATE TABLE {name} AS SELECT * FROM {name}_arrow")
+            self._db.unregister(f"{name}_arrow")
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, _Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.operations: Counter = Counter()
+        logger.info(
+            "Emulator loaded members=%s claims=%s latency=%s",
+            members.num_rows,
+            claims.num_rows,
+            latency,
+        )
+
+    def _run(self, sql: str) -> pa.Table:
+        return self._db.cursor().execute(sql).fetch_arrow_table()
+
+    def _submit(self, sql: str) -> Dict[str, str]:
+        query_id = uuid.uuid4().hex
+        job = _Job(query_id, sql, self._pool.submit(self._run, sql))
+        with self._lock:
+            self._jobs[query_id] = job
+            while len(self._jobs) > self.max_jobs:
+                _, evicted = self._jobs.popitem(last=False)
+                evicted.future.cancel()
+        return {"queryId": query_id}
+
+    def _query(self, query_id: str) -> Dict[str, Any]:
+        with self._lock:
+            job = self._jobs.get(query_id)
+            if job is not None:
+                self._jobs.move_to_end(query_id)
+        if job is None:
+            raise GraphQLError(f"Query {query_id} not found")
+
+        result = {"queryId": query_id, "sql": job.sql, "error": None, "arrowResult": None}
+        elapsed = time.monotonic() - job.created
+        if not job.future.done() or elapsed < self.latency:
+            progress = elapsed / self.latency if self.latency else 1.0
+            result["status"] = "PENDING" if progress < 0.2 else "COMPILED" if progress < 0.4 else "RUNNING"
+            return result
+
+        error = job.future.exception()
+        if error is not None:
+            result.update(status="FAILED", error=str(error))
+        else:
+            result.update(status="SUCCESSFUL", arrowResult=_arrow_result(job.future.result()))
+        return result
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        dimensions = [
+            {
+                "name": name,
+                "qualifiedName": name,
+                "label": name.split("__")[-1].replace("_", " ").title(),
+                "description": None,
+                "expr": expr.split(".", 1)[-1],
+                "isPartition": False,
+                "queryableGranularities": GRAINS if type == "TIME" else [],
+                "type": type,
+            }
+            for name, (expr, type) in DIMENSIONS.items()
+        ]
+        entities = [
+            {"name": name, "expr": expr.split(".", 1)[-1], "role": None, "type": type, "description": None}
+            for name, (expr, type) in ENTITIES.items()
+        ]
+        return [
+            {
+                "name": name,
+                "label": label,
+                "description": label,
+                "config": {"meta": {}},
+                "dimensions": dimensions,
+                "entities": entities,
+                "filter": {"whereSqlTemplate": filter} if filter else None,
+                "measures": [
+                    {"name": column, "agg": agg, "aggTimeDimension": time_dimension, "expr": column}
+                ],
+                "queryableGranularities": GRAINS,
+                "requiresMetricTime": False,
+                "type": "SIMPLE",
+            }
+            for name, (label, agg, column, filter, time_dimension) in METRICS.items()
+        ]
+
+    def _resolve(self, field: _Field, variables: Dict[str, Any]) -> Any:
+        args = {
+            key: variables.get(value[1:]) if value.startswith("$") else value
+            for key, value in field.arguments.items()
+        }
+        if field.name == "metrics":
+            return self.metrics()
+        if field.name == "savedQueries":
+            return SAVED_QUERIES
+        if field.name == "createQuery":
+            return self._submit(
+                compile_query(
+                    args.get("metrics") or [],
+                    args.get("groupBy"),
+                    args.get("where"),
+                    args.get("orderBy"),
+                    args.get("limit"),
+                )
+            )
+        if field.name == "createDimensionValuesQuery":
+            return self._submit(compile_dimension_values(args.get("groupBy") or []))
+        if field.name == "query":
+            return self._query(args.get("queryId"))
+        if field.name == "environment":
+            return {"applied": {"models": {"edges": [{"node": {"accountId": 1, "projectId": 1}}]}}}
+        raise GraphQLError(f"Field {field.name!r} is not supported by the emulator")
+
+    def execute(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one GraphQL request and return the response document."""
+        match = _OPERATION.search(payload.get("query") or "")
+        with self._lock:
+            self.requests += 1
+            self.operations[match.group(1) if match else "anonymous"] += 1
+        variables = payload.get("variables") or {}
+        data, errors = {}, []
+        try:
+            fields = parse_document(payload.get("query") or "")
+        except (GraphQLError, IndexError) as e:
+            return {"data": None, "errors": [{"message": f"Unable to parse document: {e}"}]}
+
+        for field in fields:
+            try:
+                data[field.alias] = _select(self._resolve(field, variables), field.selection)
+            except (GraphQLError, ValueError) as e:
+                data[field.alias] = None
+                errors.append({"message": str(e), "path": [field.alias]})
+
+        response = {"data": data if any(v is not None for v in data.values()) else None}
+        if errors:
+            response["errors"] = errors
+        return response
+
+    def record_traffic(self, received: int, sent: int) -> None:
+        with self._lock:
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests, bytes and per-operation call counts served so far."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+                "operations": dict(self.operations),
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        self._db.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "EmulatorServer"
+
+    def do_POST(self):
+        if self.path.split("?")[0] not in ("/api/graphql", "/beta/graphql"):
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400, "Request body is not JSON")
+            return
+
+        body = json.dumps(self.server.emulator.execute(payload)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.emulator.record_traffic(length, len(body))
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class EmulatorServer(ThreadingHTTPServer):
+    """HTTP front end serving an emulator at ``/api/graphql``."""
+
+    daemon_threads = True
+
+    def __init__(self, emulator: SemanticLayerEmulator, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.emulator = emulator
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "EmulatorServer":
+        """Serve requests on a background thread and return ``self``."""
+        threading.Thread(target=self.serve_forever, name="sl-emulator", daemon=True).start()
+        return self
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.emulator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local dbt Semantic Layer emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each query takes")
+    parser.add_argument(
+        "--data", help="Directory written by synthetic_data.py; overrides --members"
+    )
+    parser.add_argument(
+        "--members", type=int, default=0, help="Scale the roster to this many members"
+    )
+    parser.add_argument("--claims-per-member", type=float, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.data:
+        members, claims = load_dataset(args.data)
+    else:
+        members = scale_members(args.members, args.seed) if args.members else load_base_members()
+        claims = generate_claims(members, args.claims_per_member, args.seed)
+    server = EmulatorServer(
+        SemanticLayerEmulator(members, claims, latency=args.latency), args.host, args.port
+    )
+    logger.info("Serving the Semantic Layer emulator at %s/api/graphql", server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
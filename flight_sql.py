@@ -0,0 +1,295 @@
+# stdlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, TypeVar, Union
+from urllib.parse import urlparse
+
+# third party
+import pyarrow as pa
+import streamlit as st
+
+try:
+    from pyarrow import flight
+except ImportError:
+    flight = None
+
+# first party
+from client import (
+    MAX_CONCURRENT_QUERIES,
+    READ_TIMEOUT,
+    ConnAttr,
+    QueryError,
+    ServiceUnavailableError,
+    get_circuit_breaker,
+    get_rate_limiter,
+)
+from schema import Query
+import telemetry
+
+
+logger = logging.getLogger(__name__)
+
+# Set DBT_SL_TRANSPORT=flight to run queries over Arrow Flight SQL instead of GraphQL
+TRANSPORT = os.getenv("DBT_SL_TRANSPORT", "graphql").strip().lower()
+# Optional override, e.g. "grpc://localhost:8815" for a local stand-in server
+FLIGHT_URI = os.getenv("DBT_SL_FLIGHT_URI", "").strip()
+
+STATEMENT_QUERY_TYPE = (
+    "type.googleapis.com/arrow.flight.protocol.sql.CommandStatementQuery"
+)
+# An endpoint location meaning "fetch from the server that returned the FlightInfo"
+REUSE_CONNECTION = "arrow-flight-reuse-connection://?"
+
+T = TypeVar("T")
+
+
+def flight_enabled() -> bool:
+    """Whether the Flight SQL transport is available and opted into."""
+    return TRANSPORT == "flight" and flight is not None
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _length_delimited(field: int, data: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(data)) + data
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_fields(data: bytes) -> Dict[int, bytes]:
+    """Decode the length-delimited fields of a protobuf message."""
+    fields = {}
+    pos = 0
+    while pos < len(data):
+        tag, pos = _read_varint(data, pos)
+        if tag & 0x7 != 2:
+            raise ValueError(f"Unsupported protobuf wire type {tag & 0x7}")
+        length, pos = _read_varint(data, pos)
+        fields[tag >> 3] = data[pos : pos + length]
+        pos += length
+    return fields
+
+
+def encode_statement_query(sql: str) -> bytes:
+    """
+    Encode ``sql`` as a Flight SQL ``CommandStatementQuery`` wrapped in
+    ``google.protobuf.Any``, the command format Flight SQL servers expect.
+    """
+    command = _length_delimited(1, sql.encode("utf-8"))
+    return _length_delimited(1, STATEMENT_QUERY_TYPE.encode("utf-8")) + (
+        _length_delimited(2, command)
+    )
+
+
+def decode_statement_query(command: bytes) -> str:
+    """Inverse of ``encode_statement_query``."""
+    any_fields = _read_fields(command)
+    type_url = any_fields.get(1, b"").decode("utf-8")
+    if type_url != STATEMENT_QUERY_TYPE:
+        raise ValueError(f"Unsupported Flight SQL command {type_url!r}")
+    return _read_fields(any_fields.get(2, b"")).get(1, b"").decode("utf-8")
+
+
+def flight_location(conn: ConnAttr) -> str:
+    """Translate the GraphQL host of a connection into its Flight endpoint."""
+    if FLIGHT_URI:
+        return FLIGHT_URI
+    netloc = urlparse(conn.host).netloc or conn.host
+    return f"grpc+tls://{netloc}:443"
+
+
+@st.cache_resource(show_spinner=False)
+def get_flight_client(location: str) -> "flight.FlightClient":
+    """Return a process-wide Flight client for ``location``."""
+    logger.info("Created Flight SQL client location=%s", location)
+    return flight.FlightClient(location)
+
+
+def _call_options(conn: ConnAttr, source: str = None) -> "flight.FlightCallOptions":
+    headers = [
+        (b"authorization", conn.auth_header.encode("utf-8")),
+        (b"environmentid", str(conn.params["environmentid"]).encode("utf-8")),
+        (b"x-dbt-partner-source", (source or "streamlit").encode("utf-8")),
+    ]
+    return flight.FlightCallOptions(headers=headers)
+
+
+def _guarded(conn: ConnAttr, location: str, call: Callable[[], T]) -> T:
+    """
+    Run a Flight RPC against ``location`` behind the tenant's rate limiter
+    and the location's circuit breaker, as ``client.submit_request`` does for
+    GraphQL.
+
+    Raises:
+        ServiceUnavailableError: If throttled, failing fast or unreachable
+        QueryError: If the server rejects or fails the query
+    """
+    limiter = get_rate_limiter(conn.host, conn.auth_header)
+    if not limiter.acquire(timeout=READ_TIMEOUT):
+        raise ServiceUnavailableError("Semantic Layer rate limit exceeded for this tenant")
+    breaker = get_circuit_breaker(location)
+    if not breaker.allow():
+        raise ServiceUnavailableError(
+            "The Semantic Layer is currently unavailable. Please try again shortly."
+        )
+    try:
+        result = call()
+    except (flight.FlightUnavailableError, flight.FlightTimedOutError) as e:
+        breaker.record_failure()
+        logger.warning("Flight SQL request error location=%s error=%s", location, e)
+        raise ServiceUnavailableError(f"Unable to reach the Semantic Layer: {e}") from e
+    except (flight.FlightServerError, flight.FlightInternalError) as e:
+        breaker.record_failure()
+        logger.error("Flight SQL query failed location=%s error=%s", location, e)
+        raise QueryError(str(e)) from e
+    except flight.FlightError as e:
+        # Rejected by a healthy server, e.g. bad credentials or SQL
+        breaker.record_success()
+        logger.error("Flight SQL query failed location=%s error=%s", location, e)
+        raise QueryError(str(e)) from e
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+
+def _endpoint_locations(endpoint: "flight.FlightEndpoint", coordinator: str) -> List[str]:
+    """Where an endpoint's data may be fetched from, in order of preference."""
+    locations = []
+    for location in endpoint.locations:
+        uri = location.uri.decode("utf-8")
+        locations.append(coordinator if uri == REUSE_CONNECTION else uri)
+    return locations or [coordinator]
+
+
+def _fetch_endpoint(
+    conn: ConnAttr,
+    endpoint: "flight.FlightEndpoint",
+    coordinator: str,
+    options: "flight.FlightCallOptions",
+) -> List[pa.RecordBatch]:
+    """
+    Read an endpoint's record batches from the first of its locations that
+    is reachable.
+    """
+    locations = _endpoint_locations(endpoint, coordinator)
+    for n, location in enumerate(locations, 1):
+        client = get_flight_client(location)
+        try:
+            return _guarded(
+                conn,
+                location,
+                lambda: [chunk.data for chunk in client.do_get(endpoint.ticket, options)],
+            )
+        except ServiceUnavailableError:
+            if n == len(locations):
+                raise
+            logger.warning("Falling back to the next Flight endpoint location=%s", location)
+
+
+def execute_flight_query(conn: ConnAttr, query: Query, source: str = None) -> pa.Table:
+    """
+    Run ``query.jdbc_query`` over Arrow Flight SQL and return a ``pyarrow.Table``.
+
+    Record batches are streamed straight from each endpoint, skipping the
+    base64 and JSON round trip of the GraphQL transport.  Endpoints are read
+    from the locations the server lists for them, or from the server itself
+    when it lists none.
+
+    Raises:
+        QueryError: If the server rejects or fails the query
+        ServiceUnavailableError: If the server is throttled, failing fast or
+            unreachable
+    """
+    if flight is None:
+        raise QueryError("pyarrow was built without Flight support")
+
+    coordinator = flight_location(conn)
+    client = get_flight_client(coordinator)
+    options = _call_options(conn, source=source)
+    descriptor = flight.FlightDescriptor.for_command(
+        encode_statement_query(query.jdbc_query)
+    )
+    with telemetry.span("sl.flight_query") as flight_span:
+        info = _guarded(conn, coordinator, lambda: client.get_flight_info(descriptor, options))
+        batches: List[pa.RecordBatch] = []
+        for endpoint in info.endpoints:
+            batches.extend(_fetch_endpoint(conn, endpoint, coordinator, options))
+        table = pa.Table.from_batches(batches, schema=info.schema)
+        flight_span.set(endpoints=len(info.endpoints), rows=table.num_rows, bytes=table.nbytes)
+    logger.info(
+        "Flight SQL query finished rows=%s bytes=%s", table.num_rows, table.nbytes
+    )
+    return table
+
+
+def execute_flight_queries(
+    conn: ConnAttr,
+    queries: Sequence[Query],
+    source: str = None,
+    max_workers: int = MAX_CONCURRENT_QUERIES,
+) -> Iterator[Tuple[int, Union[pa.Table, QueryError]]]:
+    """Flight SQL counterpart of ``client.execute_queries``."""
+    if not queries:
+        return
+
+    workers = max(1, min(max_workers, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sl-flight") as pool:
+        # Each worker runs in a copy of this context so its spans nest under ours
+        futures = {
+            pool.submit(copy_context().run, execute_flight_query, conn, query, source=source): i
+            for i, query in enumerate(queries)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except QueryError as e:
+                yield futures[future], e
+
+
+if flight is not None:
+
+    class StandInFlightServer(flight.FlightServerBase):
+        """
+        Minimal Flight SQL server for exercising this module locally.
+
+        ``resolver`` receives the SQL text of each statement and returns the
+        ``pyarrow.Table`` to serve for it.
+        """
+
+        def __init__(self, resolver, location: str = "grpc://127.0.0.1:0", **kwargs):
+            super().__init__(location, **kwargs)
+            self._resolver = resolver
+
+        def get_flight_info(self, context, descriptor):
+            sql = decode_statement_query(descriptor.command)
+            table = self._resolver(sql)
+            endpoint = flight.FlightEndpoint(sql.encode("utf-8"), [])
+            return flight.FlightInfo(
+                table.schema, descriptor, [endpoint], table.num_rows, table.nbytes
+            )
+
+        def do_get(self, context, ticket):
+            return flight.RecordBatchStream(self._resolver(ticket.ticket.decode("utf-8")))
@@ -2,9 +2,10 @@
 import base64
 import binascii
 import json
+import os
 import urllib.parse
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
 
 # third party
 import pandas as pd
@@ -14,13 +15,18 @@ import streamlit as st
 # first party
 from client import ConnAttr
 from schema import Query
+import telemetry
 
 
 def keys_exist_in_dict(keys_list: Iterable[str], dct: Mapping[str, Any]) -> bool:
     return all(key in dct for key in keys_list)
 
 
-MEMBER_ROSTER_PATH = Path(__file__).resolve().parent / "data" / "members.csv"
+# Point at a larger roster, e.g. one written by synthetic_data.py
+MEMBER_ROSTER_PATH = Path(
+    os.getenv("MEMBER_ROSTER_PATH", "").strip()
+    or Path(__file__).resolve().parent / "data" / "members.csv"
+)
 USER_FILTER_DIMENSION = "member__email"
 
 COMPANY_ID_MAP = {
@@ -121,7 +127,7 @@ def get_member_roster() -> pd.DataFrame:
         df = pd.read_csv(MEMBER_ROSTER_PATH)
     except FileNotFoundError:
         st.error(
-            "Member roster file not found. Ensure `data/members.csv` exists."
+            f"Member roster file not found. Ensure `{MEMBER_ROSTER_PATH}` exists."
         )
         return pd.DataFrame()
 
@@ -248,12 +254,18 @@ def get_portal_title(company_name: Optional[str]) -> str:
     return "Member Portal"
 
 
-def to_arrow_table(byte_string: str, to_pandas: bool = True) -> pa.Table:
-    with pa.ipc.open_stream(base64.b64decode(byte_string)) as reader:
-        arrow_table = pa.Table.from_batches(reader, reader.schema)
+def to_arrow_table(byte_string: Union[str, pa.Table], to_pandas: bool = True) -> pa.Table:
+    with telemetry.span("to_arrow_table", to_pandas=to_pandas) as decode_span:
+        if isinstance(byte_string, pa.Table):
+            arrow_table = byte_string
+        else:
+            decode_span.set(encoded_bytes=len(byte_string))
+            with pa.ipc.open_stream(base64.b64decode(byte_string)) as reader:
+                arrow_table = pa.Table.from_batches(reader, reader.schema)
+        decode_span.set(rows=arrow_table.num_rows)
 
-    if to_pandas:
-        return arrow_table.to_pandas()
+        if to_pandas:
+            return arrow_table.to_pandas()
 
     return arrow_table
 
@@ -3,16 +3,26 @@ Shared initialization logic for the Streamlit app.
 This ensures metrics and connection are loaded regardless of which page the user visits first.
 """
 
+import logging
+
 import streamlit as st
-from client import ensure_connection, submit_request
-from llm.semantic_layer_docs import create_chroma_db
+from catalog import NoMetricsError, get_catalog
+from client import QueryError, ensure_connection, submit_request
 from queries import GRAPHQL_QUERIES
+from telemetry import start_metrics_server
+
+
+logger = logging.getLogger(__name__)
 
 
 def retrieve_saved_queries():
     """Fetch saved queries from the Semantic Layer."""
     payload = {"query": GRAPHQL_QUERIES["saved_queries"]}
-    json_data = submit_request(st.session_state.conn, payload)
+    try:
+        json_data = submit_request(st.session_state.conn, payload)
+    except QueryError as e:
+        logger.warning("Error retrieving saved queries error=%s", e)
+        return
     saved_queries = json_data.get("data", {}).get("savedQueries", [])
     if saved_queries:
         st.session_state.saved_queries = saved_queries
@@ -59,11 +69,14 @@ def initialize_app(show_spinner: bool = True):
     Returns:
         bool: True if initialization was successful, False otherwise
     """
+    # Expose /metrics once per process when DBT_SL_METRICS_PORT is set
+    start_metrics_server()
+
     # Ensure connection is established
     ensure_connection()
 
     # Check if metrics are already loaded
-    if "metric_dict" in st.session_state and "dimension_dict" in st.session_state:
+    if "catalog" in st.session_state:
         return True
 
     # Load metrics from Semantic Layer
@@ -78,47 +91,24 @@ def initialize_app(show_spinner: bool = True):
 
 def _load_metrics():
     """Internal function to load metrics from the Semantic Layer."""
-    payload = {"query": GRAPHQL_QUERIES["metrics"]}
-    json = submit_request(st.session_state.conn, payload)
-
     try:
-        metrics = json["data"]["metrics"]
-    except TypeError:
-        # `data` is None and there may be an error
-        try:
-            error = json["errors"][0]["message"]
-            st.error(f"Error loading metrics: {error}")
-        except (KeyError, TypeError):
-            st.warning(
-                "No metrics returned. Ensure your project has metrics defined "
-                "and a production job has been run successfully."
-            )
+        catalog = get_catalog(st.session_state.conn)
+    except QueryError as e:
+        st.error(f"Error loading metrics: {e}")
         return False
-    else:
-        # Create vector database for LLM usage
-        create_chroma_db(metrics)
-
-        # Store metrics in session state
-        st.session_state.metric_dict = {m["name"]: m for m in metrics}
-        st.session_state.dimension_dict = {
-            dim["name"]: dim for metric in metrics for dim in metric["dimensions"]
-        }
-
-        # Flatten dimensions list for each metric
-        for metric in st.session_state.metric_dict:
-            st.session_state.metric_dict[metric]["dimensions"] = [
-                d["name"]
-                for d in st.session_state.metric_dict[metric]["dimensions"]
-            ]
-
-        if not st.session_state.metric_dict:
-            st.warning(
-                "No Metrics returned! Ensure your project has metrics defined "
-                "and a production job has been run successfully."
-            )
-            return False
-        else:
-            # Load additional metadata
-            retrieve_saved_queries()
-            retrieve_account_id()
-            return True
+    except NoMetricsError:
+        st.warning(
+            "No metrics returned. Ensure your project has metrics defined "
+            "and a production job has been run successfully."
+        )
+        return False
+
+    # Sessions share the tenant's catalog; these are read-only views of it
+    st.session_state.catalog = catalog
+    st.session_state.metric_dict = catalog.metrics
+    st.session_state.dimension_dict = catalog.dimensions
+
+    # Load additional metadata
+    retrieve_saved_queries()
+    retrieve_account_id()
+    return True
@@ -8,7 +8,8 @@ import streamlit as st
 
 # first party
 from audit_logger import log_query_execution
-from client import get_query_results
+from client import QueryError, execute_cached_queries, execute_query_batch
+from flight_sql import execute_flight_queries, flight_enabled
 from helpers import (
     ensure_member_context,
     get_portal_title,
@@ -17,6 +18,7 @@ from helpers import (
 from init_app import initialize_app
 from schema import Query
 from styles import apply_glassmorphic_theme
+import telemetry
 
 st.set_page_config(
     page_title="AI Benefits Portal - Member Dashboard",
@@ -73,15 +75,13 @@ def simplify_column(name: str) -> str:
     return simple
 
 
-@st.cache_data(show_spinner=False)
-def run_member_query(
+def build_member_query(
     metrics: Tuple[str, ...],
     *,
     group_by: Sequence[Tuple[str, Optional[str]]] = (),
     where: Sequence[str] = (),
     limit: Optional[int] = None,
-    _member_email: Optional[str] = None,
-) -> pd.DataFrame:
+) -> Query:
     query_kwargs: Dict[str, object] = {
         "metrics": [{"name": metric} for metric in metrics],
     }
@@ -98,69 +98,128 @@ def run_member_query(
     if limit is not None:
         query_kwargs["limit"] = limit
 
-    logger.info(
-        "Executing member query metrics=%s group_by=%s where=%s limit=%s",
-        metrics,
-        group_by,
-        where,
-        limit,
-    )
+    return Query(**query_kwargs)
 
-    status = "success"
-    error_msg = None
-    df = pd.DataFrame()
 
-    try:
-        gql_query = Query(**query_kwargs)
-        payload = {"query": gql_query.gql, "variables": gql_query.variables}
-        data = get_query_results(payload, progress=False, conn=st.session_state.conn)
-        arrow_bytes = data.get("arrowResult")
-        if not arrow_bytes:
-            df = pd.DataFrame()
-        else:
-            df = to_arrow_table(arrow_bytes)
-            if not df.empty:
-                df.columns = [simplify_column(col) for col in df.columns]
-    except Exception as e:
-        status = "failed"
-        error_msg = str(e)
-        logger.error(f"Query failed: {e}")
-        raise
-    finally:
-        # Log audit event (only if member_email is provided)
-        if _member_email:
-            log_query_execution(
-                query_type="member_dashboard",
-                member_email=_member_email,
-                filters_applied=list(where),
-                metrics=list(metrics),
-                dimensions=[f"{name}__{grain}" if grain else name for name, grain in group_by],
-                row_count=len(df) if not df.empty else 0,
-                status=status,
-                error_message=error_msg,
-                page="Member Dashboard",
-            )
+def member_panel_queries(filter_clause: str) -> Dict[str, Dict[str, object]]:
+    """Keyword arguments for `build_member_query`, one entry per dashboard panel."""
+    where = (filter_clause,)
+    return {
+        "summary": {
+            "metrics": (
+                "ytd_member_responsibility",
+                "total_paid_by_insurance",
+                "total_claim_amount",
+                "total_claims_count",
+            ),
+            "where": where,
+        },
+        "spend": {
+            "metrics": ("ytd_member_responsibility", "total_paid_by_insurance"),
+            "group_by": (("claim__claim_date", "DAY"),),
+            "where": where,
+        },
+        "claim_type": {
+            "metrics": ("total_claims_count",),
+            "group_by": (("claim__claim_type", None),),
+            "where": where,
+        },
+        "provider": {
+            "metrics": (
+                "total_member_responsibility",
+                "total_paid_by_insurance",
+                "total_claim_amount",
+            ),
+            "group_by": (("claim__provider_name", None),),
+            "where": where,
+        },
+        "claim_status": {
+            "metrics": ("total_claims_count",),
+            "group_by": (("claim__claim_status", None),),
+            "where": where,
+        },
+    }
 
-    return df
 
+def run_member_queries(
+    panels: Dict[str, Dict[str, object]],
+    _member_email: Optional[str] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Execute every panel query as one batch and return a DataFrame per panel.
 
-def get_member_summary(filter_clause: str, member_email: str) -> Dict[str, float]:
+    Panels already in the shared result cache are not re-executed.  The rest
+    are answered from per-member cube queries, one for each group of panels
+    whose metrics cover the same rows, when the metrics can be re-aggregated
+    locally.
+    """
+    names = list(panels)
+    queries = [build_member_query(**panels[name]) for name in names]
+
+    logger.info("Executing %s member queries as a batch panels=%s", len(names), names)
+
+    with telemetry.span("dashboard.run_member_queries", panels=len(names)) as panel_span:
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, str] = {}
+        executor = execute_flight_queries if flight_enabled() else execute_query_batch
+        results = execute_cached_queries(
+            st.session_state.conn, queries, executor=executor, cube=True
+        )
+
+        try:
+            completed = list(results)
+        except QueryError as e:
+            logger.error(f"Member queries failed: {e}")
+            st.error(str(e))
+            st.stop()
+
+        for i, result in completed:
+            name = names[i]
+            df = pd.DataFrame()
+            if isinstance(result, QueryError):
+                errors[name] = str(result)
+                logger.error(f"Query failed panel={name}: {result}")
+            else:
+                if result.get("arrowResult"):
+                    df = to_arrow_table(result["arrowResult"])
+                if not df.empty:
+                    df.columns = [simplify_column(col) for col in df.columns]
+            frames[name] = df
+
+            # Log audit event (only if member_email is provided)
+            if _member_email:
+                spec = panels[name]
+                log_query_execution(
+                    query_type="member_dashboard",
+                    member_email=_member_email,
+                    filters_applied=list(spec.get("where", ())),
+                    metrics=list(spec["metrics"]),
+                    dimensions=[
+                        f"{dim}__{grain}" if grain else dim
+                        for dim, grain in spec.get("group_by", ())
+                    ],
+                    row_count=len(df) if not df.empty else 0,
+                    status="failed" if name in errors else "success",
+                    error_message=errors.get(name),
+                    page="Member Dashboard",
+                )
+
+        panel_span.set(rows=sum(len(df) for df in frames.values()), failed=len(errors))
+
+    if errors:
+        st.error(next(iter(errors.values())))
+        st.stop()
+
+    return frames
+
+
+def get_member_summary(metrics_df: pd.DataFrame) -> Dict[str, float]:
     summary = {
         "ytd_member_responsibility": 0.0,
         "total_paid_by_insurance": 0.0,
         "total_claim_amount": 0.0,
         "total_claims_count": 0,
     }
-    metrics_df = run_member_query(
-        (
-            "ytd_member_responsibility",
-            "total_paid_by_insurance",
-            "total_claim_amount",
-            "total_claims_count",
-        ),
-        where=(filter_clause,),
-        _member_email=member_email,
-    )
     if not metrics_df.empty:
         row = metrics_df.iloc[0]
         summary["ytd_member_responsibility"] = float(
@@ -176,43 +235,22 @@ def get_member_summary(filter_clause: str, member_email: str) -> Dict[str, float
     return summary
 
 
-def get_spend_timeseries(filter_clause: str, member_email: str) -> pd.DataFrame:
-    df = run_member_query(
-        ("ytd_member_responsibility", "total_paid_by_insurance"),
-        group_by=(("claim__claim_date", "DAY"),),
-        where=(filter_clause,),
-        _member_email=member_email,
-    )
+def get_spend_timeseries(df: pd.DataFrame) -> pd.DataFrame:
     if not df.empty and "claim_date" in df.columns:
+        df = df.copy()
         df["claim_date"] = pd.to_datetime(df["claim_date"])
         df = df.sort_values("claim_date")
     return df
 
 
-def get_claims_by_type(filter_clause: str, member_email: str) -> pd.DataFrame:
-    df = run_member_query(
-        ("total_claims_count",),
-        group_by=(("claim__claim_type", None),),
-        where=(filter_clause,),
-        _member_email=member_email,
-    )
+def get_claims_by_type(df: pd.DataFrame) -> pd.DataFrame:
     if not df.empty:
         df = df.rename(columns={"total_claims_count": "total_claims"})
         df = df.sort_values("total_claims", ascending=False)
     return df
 
 
-def get_provider_breakdown(filter_clause: str, member_email: str) -> pd.DataFrame:
-    df = run_member_query(
-        (
-            "total_member_responsibility",
-            "total_paid_by_insurance",
-            "total_claim_amount",
-        ),
-        group_by=(("claim__provider_name", None),),
-        where=(filter_clause,),
-        _member_email=member_email,
-    )
+def get_provider_breakdown(df: pd.DataFrame) -> pd.DataFrame:
     if not df.empty:
         df = df.rename(columns={
             "provider_name": "provider",
@@ -224,13 +262,7 @@ def get_provider_breakdown(filter_clause: str, member_email: str) -> pd.DataFram
     return df
 
 
-def get_claim_status_breakdown(filter_clause: str, member_email: str) -> pd.DataFrame:
-    df = run_member_query(
-        ("total_claims_count",),
-        group_by=(("claim__claim_status", None),),
-        where=(filter_clause,),
-        _member_email=member_email,
-    )
+def get_claim_status_breakdown(df: pd.DataFrame) -> pd.DataFrame:
     if not df.empty:
         df = df.rename(columns={"claim_status": "status", "total_claims_count": "total_claims"})
         df = df.sort_values("total_claims", ascending=False)
@@ -278,7 +310,11 @@ except ValueError as exc:
     st.error(str(exc))
     st.stop()
 
-member_summary = get_member_summary(member_filter_clause, current_member_email)
+panel_frames = run_member_queries(
+    member_panel_queries(member_filter_clause),
+    _member_email=current_member_email,
+)
+member_summary = get_member_summary(panel_frames["summary"])
 
 details_col, metrics_col = st.columns([1, 1.5])
 
@@ -344,7 +380,7 @@ with metrics_col:
         f"{member_summary['total_claims_count']:,}",
     )
 
-spend_ts = get_spend_timeseries(member_filter_clause, current_member_email)
+spend_ts = get_spend_timeseries(panel_frames["spend"])
 st.subheader("Spend Over Time")
 if spend_ts.empty:
     st.info("No claim activity available for this member yet.")
@@ -394,7 +430,7 @@ else:
     
     st.plotly_chart(fig, use_container_width=True)
 
-claim_type_df = get_claims_by_type(member_filter_clause, current_member_email)
+claim_type_df = get_claims_by_type(panel_frames["claim_type"])
 st.subheader("Claims by Type")
 if claim_type_df.empty:
     st.info("No claims by type to display.")
@@ -433,7 +469,7 @@ else:
     
     st.plotly_chart(fig, use_container_width=True)
 
-provider_df = get_provider_breakdown(member_filter_clause, current_member_email)
+provider_df = get_provider_breakdown(panel_frames["provider"])
 st.subheader("Top Providers")
 if provider_df.empty:
     st.info("No provider activity for this member.")
@@ -455,7 +491,7 @@ else:
         },
     )
 
-status_df = get_claim_status_breakdown(member_filter_clause, current_member_email)
+status_df = get_claim_status_breakdown(panel_frames["claim_status"])
 st.subheader("Claim Status Overview")
 if status_df.empty:
     st.info("No claim status information available.")
@@ -473,8 +509,8 @@ This dashboard enforces the member filter in two deterministic steps:
 
 1. `member_filter()` (top of this file) builds a SQL clause from the selected member's email and
    raises immediately if the email is missing.
-2. Every helper that calls the Semantic Layer (`run_member_query`) injects that clause into the `where`
-   argument so only user-scoped queries are executed.
+2. Every panel query (`member_panel_queries`) injects that clause into the `where` argument, and
+   `run_member_queries` executes them as one batch so only user-scoped queries are executed.
 
 Because the clause is generated from a locked session context, members cannot alter it through the UI,
 and every downstream query shares the same guardrail. Below is the exact clause this demo applies:
@@ -484,8 +520,9 @@ and every downstream query shares the same guardrail. Below is the exact clause
 st.code(
     """
 member_filter_clause = member_filter(current_member)
-member_summary = get_member_summary(member_filter_clause)
-spend_ts = get_spend_timeseries(member_filter_clause)
+panel_frames = run_member_queries(member_panel_queries(member_filter_clause))
+member_summary = get_member_summary(panel_frames["summary"])
+spend_ts = get_spend_timeseries(panel_frames["spend"])
     """,
     language="python",
 )
@@ -15,7 +15,6 @@ from helpers import (
     create_tabs,
     ensure_member_context,
     get_portal_title,
-    get_shared_elements,
     to_arrow_table,
 )
 from init_app import initialize_app
@@ -215,30 +214,25 @@ with ad_hoc_tab:
 
     col1, col2 = st.columns(2)
 
-    # Retrieve metrics from dictionary
+    # Offer the metrics that can be grouped by the dimensions already selected
+    catalog = st.session_state.catalog
+    metric_options = catalog.compatible_metrics(
+        st.session_state.get("selected_dimensions", [])
+    ) | set(st.session_state.get("selected_metrics", []))
     col1.multiselect(
         label="Select Metric(s)",
-        options=sorted(st.session_state.metric_dict.keys()),
+        options=sorted(metric_options),
         default=None,
         key="selected_metrics",
         placeholder="Select a Metric",
     )
 
     # Retrieve unique dimensions based on overlap of metrics selected
-    all_dimensions = [
-        v["dimensions"]
-        for k, v in st.session_state.metric_dict.items()
-        if k in st.session_state.selected_metrics
-    ]
-    unique_dimensions = get_shared_elements(all_dimensions)
+    unique_dimensions = catalog.shared_dimensions(st.session_state.selected_metrics)
 
     # A cumulative metric needs to always be viewed over time so we select metric_time
-    requires_metric_time = any(
-        [
-            v["requiresMetricTime"]
-            for k, v in st.session_state.metric_dict.items()
-            if k in st.session_state.get("selected_metrics", [])
-        ]
+    requires_metric_time = catalog.requires_metric_time(
+        st.session_state.get("selected_metrics", [])
     )
 
     default_options = ["metric_time"] if requires_metric_time else None
@@ -260,15 +254,10 @@ with ad_hoc_tab:
     )
     if "time" in dimension_types or requires_metric_time:
         col1, col2 = st.columns(2)
-        grains = [
-            st.session_state.metric_dict[metric]["queryableGranularities"]
-            for metric in st.session_state.selected_metrics
-        ]
+        grains = catalog.shared_granularities(st.session_state.selected_metrics)
         col1.selectbox(
             label="Select Grain",
-            options=sort_by_time_length(
-                [g.strip().lower() for g in get_shared_elements(grains)]
-            ),
+            options=sort_by_time_length([g.lower() for g in grains]),
             key="selected_grain",
         )
 
@@ -299,13 +288,12 @@ with ad_hoc_tab:
         cli_command = construct_cli_command(query)
         tab4.code(cli_command, language="bash")
 
-    if st.button("Submit Query"):
+    if st.button("Submit Query", key="submit_query"):
         if len(st.session_state.selected_metrics) == 0:
             st.warning("You must select at least one metric!")
             st.stop()
 
-        payload = {"query": query.gql, "variables": query.variables}
-        data = get_query_results(payload)
+        data = get_query_results(query)
         df = to_arrow_table(data["arrowResult"])
         df.columns = [col.lower() for col in df.columns]
         st.session_state.query_qm = query
@@ -360,8 +348,7 @@ with saved_query_tab:
             tab3.code(sdk_code, language="python")
 
         if st.button("Submit Query", key="submit_query_sq"):
-            payload = {"query": query.gql, "variables": query.variables}
-            data = get_query_results(payload)
+            data = get_query_results(query)
             df = to_arrow_table(data["arrowResult"])
             df.columns = [col.lower() for col in df.columns]
             st.session_state.query_sq = query
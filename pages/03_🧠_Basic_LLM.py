@@ -348,11 +348,9 @@ if question:
         st.error(f"Unable to build query from response: {exc}")
         st.stop()
 
-    payload = {"query": query.gql, "variables": query.variables}
-
     with st.spinner("Running semantic layer query..."):
         try:
-            data = get_query_results(payload, source="streamlit-openai", progress=False)
+            data = get_query_results(query, source="streamlit-openai", progress=False)
         except Exception as exc:
             st.error(f"Semantic layer query failed: {exc}")
             st.stop()
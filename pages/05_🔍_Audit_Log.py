@@ -19,7 +19,9 @@ from helpers import (
     ensure_member_context,
     get_portal_title,
 )
+from scheduler import get_scheduler
 from styles import apply_glassmorphic_theme
+import telemetry
 
 st.set_page_config(
     page_title="AI Benefits Portal - Audit Log",
@@ -81,6 +83,33 @@ col4.metric(
     delta_color="inverse",
 )
 
+with st.expander("⏱️ Query Scheduler", expanded=False):
+    scheduler_stats = get_scheduler().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric(
+        "Active Slots",
+        f"{scheduler_stats['active_slots']} / {scheduler_stats['max_active']}",
+    )
+    col2.metric("Queue Depth", scheduler_stats["queue_depth"])
+    col3.metric("Avg Wait", f"{scheduler_stats['avg_wait']:.2f}s")
+    col4.metric("P95 Wait", f"{scheduler_stats['p95_wait']:.2f}s")
+    st.caption(
+        "Process-wide admission control shared by all sessions. Interactive queries are admitted "
+        "before background work, and tenants take turns within each class."
+    )
+
+with st.expander("📡 Client Telemetry", expanded=False):
+    span_summary = telemetry.REGISTRY.span_summary()
+    if span_summary:
+        st.dataframe(pd.DataFrame(span_summary), use_container_width=True, hide_index=True)
+    else:
+        st.info("No Semantic Layer requests have been timed in this process yet.")
+    st.caption(
+        "Time spent in each step of a Semantic Layer request across all sessions. "
+        "Set DBT_SL_METRICS_PORT to scrape these as Prometheus metrics, and "
+        "OTEL_EXPORTER_OTLP_ENDPOINT to export individual spans to a collector."
+    )
+
 # Security violations section
 if not violations_df.empty:
     st.subheader("⚠️ Security Violations Detected")
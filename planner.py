@@ -0,0 +1,127 @@
+# stdlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# third party
+import pyarrow as pa
+
+# first party
+from schema import Query, normalize_where_sql
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlannedQuery:
+    """A query to execute and the positions of the requested queries it answers."""
+
+    query: Query
+    members: List[int] = field(default_factory=list)
+
+    @property
+    def merged(self) -> bool:
+        return len(self.members) > 1
+
+
+def row_domain(metric_dict: Mapping[str, Dict], names: Iterable[str]) -> Optional[Tuple]:
+    """
+    Return what the metrics in ``names`` are computed over, if they all agree.
+
+    In a multi-metric result a metric has data only for the groups its own
+    (filtered) measure rows fall in, so a row that is null for one metric
+    cannot be told apart from a null aggregate.  Simple metrics with the
+    same filter, aggregation time dimension and dimensions come from the
+    same semantic model and have rows for exactly the same groups, so a
+    result over all of them splits into exactly the per-metric results.
+
+    Returns:
+        A hashable signature shared by every metric, or ``None`` if they
+        differ or one is unknown or not a simple metric
+    """
+    domains = set()
+    for name in names:
+        metric = metric_dict.get(name)
+        if not metric or (metric.get("type") or "").upper() != "SIMPLE":
+            return None
+        where = (metric.get("filter") or {}).get("whereSqlTemplate")
+        measures = metric.get("measures") or []
+        domains.add(
+            (
+                normalize_where_sql(where) if where else None,
+                tuple(sorted(m.get("aggTimeDimension") or "" for m in measures)),
+                tuple(sorted(metric.get("dimensions") or [])),
+            )
+        )
+        if len(domains) > 1:
+            return None
+    return next(iter(domains), None)
+
+
+def merge_key(query: Query) -> Optional[str]:
+    """
+    Return a key shared by queries one multi-metric query can answer.
+
+    Queries merge when they have the same ``groupBy`` (including grains),
+    ``where`` and ``orderBy``.  A ``limit`` or an ordering by metric applies
+    to the combined result, so such queries are never merged (``None``).
+    """
+    if query.limit or any(o.metric is not None for o in query.orderBy or []):
+        return None
+    canonical = query.canonical
+    del canonical["metrics"]
+    return json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+
+
+def plan_queries(
+    queries: Sequence[Query], metric_dict: Mapping[str, Dict]
+) -> List[PlannedQuery]:
+    """
+    Group ``queries`` into as few Semantic Layer queries as possible.
+
+    Each planned query asks for the union of its members' metrics, in the
+    order they were first requested.  Only metrics with the same
+    ``row_domain`` in ``metric_dict`` are merged.  Identical queries
+    collapse into one.
+    """
+    planned: List[PlannedQuery] = []
+    by_key: Dict[Tuple, PlannedQuery] = {}
+    for i, query in enumerate(queries):
+        key = merge_key(query)
+        if key is not None:
+            domain = row_domain(metric_dict, query.metric_names)
+            key = (key, domain if domain is not None else tuple(sorted(query.metric_names)))
+        plan = by_key.get(key) if key is not None else None
+        if plan is None:
+            plan = PlannedQuery(query, [i])
+            planned.append(plan)
+            if key is not None:
+                by_key[key] = plan
+            continue
+        names = set(plan.query.metric_names)
+        extra = [m for m in query.metrics if m.name not in names]
+        if extra:
+            plan.query = plan.query.model_copy(update={"metrics": plan.query.metrics + extra})
+        plan.members.append(i)
+
+    if len(planned) < len(queries):
+        logger.info("Merged %s queries into %s", len(queries), len(planned))
+    return planned
+
+
+def split_result(table: pa.Table, query: Query) -> pa.Table:
+    """
+    Return the part of a merged result that answers ``query``.
+
+    Keeps ``query``'s metric and dimension columns in the merged table's
+    order.  Every row is kept: the merged metrics must share a
+    ``row_domain``, so ``query`` alone has data for the same groups, even
+    where its aggregates are null.
+    """
+    wanted = {n.lower() for n in query.metric_names + query.dimension_names}
+    columns = [c for c in table.column_names if c.lower() in wanted]
+    if len(columns) == table.num_columns:
+        return table
+    return table.select(columns)
@@ -0,0 +1,207 @@
+# stdlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+# third party
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# first party
+from schema import normalize_where_sql
+
+
+# A normalized template such as
+# {{ TimeDimension('metric_time', 'DAY') }} BETWEEN '2024-01-01' AND '2024-03-31'
+_TIME_PREDICATE = re.compile(
+    r"\{\{ TimeDimension\('(?P<dimension>[^']+)', '(?P<grain>[A-Z]+)'\) \}\} "
+    r"(?:(?P<operator>>=|<=|>|<|=) '(?P<value>[^']*)'"
+    r"|(?P<between>BETWEEN) '(?P<low>[^']*)' AND '(?P<high>[^']*)')",
+    re.IGNORECASE,
+)
+
+_COMPARISONS = {
+    ">=": pc.greater_equal,
+    ">": pc.greater,
+    "<=": pc.less_equal,
+    "<": pc.less,
+    "=": pc.equal,
+}
+
+# Half-open [start, end) range of raw time values; None is unbounded
+Interval = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def floor_grain(value: datetime, grain: str) -> datetime:
+    """Return the start of the ``grain`` period containing ``value``."""
+    if grain == "HOUR":
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if grain == "WEEK":
+        return value - timedelta(days=value.weekday())
+    if grain == "MONTH":
+        return value.replace(day=1)
+    if grain == "QUARTER":
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if grain == "YEAR":
+        return value.replace(month=1, day=1)
+    return value
+
+
+def next_period(start: datetime, grain: str) -> datetime:
+    """Return the start of the ``grain`` period after the one starting at ``start``."""
+    if grain == "HOUR":
+        return start + timedelta(hours=1)
+    if grain == "DAY":
+        return start + timedelta(days=1)
+    if grain == "WEEK":
+        return start + timedelta(days=7)
+    months = {"MONTH": 1, "QUARTER": 3, "YEAR": 12}[grain]
+    month = start.month - 1 + months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def _ceil_grain(value: datetime, grain: str) -> datetime:
+    start = floor_grain(value, grain)
+    return start if start == value else next_period(start, grain)
+
+
+@dataclass(frozen=True)
+class TimePredicate:
+    """A comparison of a time dimension, truncated to ``grain``, with literal bounds."""
+
+    sql: str
+    dimension: str
+    grain: str
+    operator: str
+    bounds: Tuple[datetime, ...]
+
+    @property
+    def interval(self) -> Interval:
+        """The raw time values whose truncation satisfies the predicate."""
+        grain = self.grain
+        if self.operator == "BETWEEN":
+            low, high = self.bounds
+            return _ceil_grain(low, grain), next_period(floor_grain(high, grain), grain)
+        (value,) = self.bounds
+        if self.operator == ">=":
+            return _ceil_grain(value, grain), None
+        if self.operator == ">":
+            return next_period(floor_grain(value, grain), grain), None
+        if self.operator == "<=":
+            return None, next_period(floor_grain(value, grain), grain)
+        if self.operator == "<":
+            return None, _ceil_grain(value, grain)
+        if floor_grain(value, grain) == value:
+            return value, next_period(value, grain)
+        return value, value
+
+    def mask(self, values: pa.ChunkedArray) -> pa.ChunkedArray:
+        """Evaluate the predicate on a result column at ``grain`` or finer."""
+        truncated = pc.cast(
+            pc.floor_temporal(values, unit=self.grain.lower()), pa.timestamp("us")
+        )
+        bounds = [pa.scalar(b, type=pa.timestamp("us")) for b in self.bounds]
+        if self.operator == "BETWEEN":
+            return pc.and_(
+                pc.greater_equal(truncated, bounds[0]), pc.less_equal(truncated, bounds[1])
+            )
+        return _COMPARISONS[self.operator](truncated, bounds[0])
+
+
+@lru_cache(maxsize=4096)
+def parse_time_predicate(sql: str) -> Optional[TimePredicate]:
+    """
+    Parse a ``TimeDimension(...)`` range template such as ``QueryLoader``
+    produces; returns ``None`` for anything else.  Results are memoized.
+    """
+    sql = normalize_where_sql(sql)
+    match = _TIME_PREDICATE.fullmatch(sql)
+    if match is None:
+        return None
+    if match["between"]:
+        operator, values = "BETWEEN", (match["low"], match["high"])
+    else:
+        operator, values = match["operator"], (match["value"],)
+    try:
+        bounds = tuple(datetime.fromisoformat(v.strip()) for v in values)
+    except ValueError:
+        return None
+    if any(b.tzinfo is not None for b in bounds):
+        return None
+    return TimePredicate(sql, match["dimension"], match["grain"].upper(), operator, bounds)
+
+
+def _intervals(predicates: Sequence[TimePredicate]) -> Dict[str, Interval]:
+    """Intersect the predicates on each dimension."""
+    intervals: Dict[str, Interval] = {}
+    for predicate in predicates:
+        start, end = intervals.get(predicate.dimension, (None, None))
+        low, high = predicate.interval
+        if low is not None and (start is None or low > start):
+            start = low
+        if high is not None and (end is None or high < end):
+            end = high
+        intervals[predicate.dimension] = (start, end)
+    return intervals
+
+
+def _within(inner: Interval, outer: Interval) -> bool:
+    start, end = inner
+    if start is not None and end is not None and start >= end:
+        return True
+    if outer[0] is not None and (start is None or start < outer[0]):
+        return False
+    if outer[1] is not None and (end is None or end > outer[1]):
+        return False
+    return True
+
+
+def fixed_filters(where: Sequence[str]) -> FrozenSet[str]:
+    """The normalized where templates that are not time ranges."""
+    return frozenset(sql for sql in where if parse_time_predicate(sql) is None)
+
+
+def subsumed_filters(
+    source_where: Sequence[str], target_where: Sequence[str]
+) -> Optional[List[TimePredicate]]:
+    """
+    Check that rows matching ``target_where`` are a subset of those matching
+    ``source_where`` and return the predicates to apply to narrow one to the
+    other.
+
+    Both are lists of normalized where templates.  Templates other than time
+    ranges must be identical; time ranges may be narrower in the target,
+    including at a different grain.
+
+    Returns:
+        The target's time predicates missing from the source (empty when the
+        filters are equal), or ``None`` if the source does not contain the
+        target
+    """
+    source_set, target_set = set(source_where), set(target_where)
+    if source_set == target_set:
+        return []
+
+    source_time, target_time = [], []
+    source_other, target_other = set(), set()
+    for templates, time, other in (
+        (source_set, source_time, source_other),
+        (target_set, target_time, target_other),
+    ):
+        for sql in templates:
+            predicate = parse_time_predicate(sql)
+            if predicate is None:
+                other.add(sql)
+            else:
+                time.append(predicate)
+    if source_other != target_other:
+        return None
+
+    target_intervals = _intervals(target_time)
+    for dimension, interval in _intervals(source_time).items():
+        if not _within(target_intervals.get(dimension, (None, None)), interval):
+            return None
+    return [p for p in target_time if p.sql not in source_set]
@@ -109,6 +109,35 @@ query GetResults($environmentId: BigInt!, $queryId: String!) {
   }
 }
     """,
+    "get_status": """
+query GetStatus($environmentId: BigInt!, $queryId: String!) {
+  query(environmentId: $environmentId, queryId: $queryId) {
+    error
+    queryId
+    status
+  }
+}
+    """,
+    "create_query_batch": """
+mutation CreateQueries({arguments}) {{
+{fields}
+}}
+    """,
+    "create_query_field": """
+  {alias}: createQuery(
+    {kwargs}
+  ) {{
+    queryId
+  }}""",
+    "query_batch": """
+query {operation}({arguments}) {{
+{fields}
+}}
+    """,
+    "query_field": """
+  {alias}: query(environmentId: $environmentId, queryId: ${alias}QueryId) {{
+    {selection}
+  }}""",
     "queryable_granularities": """
 query GetQueryableGranularities($environmentId: BigInt!, $metrics:[MetricInput!]!) {
   queryableGranularities(environmentId: $environmentId, metrics: $metrics)
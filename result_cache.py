@@ -0,0 +1,220 @@
+# stdlib
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+# third party
+import pyarrow as pa
+import streamlit as st
+
+
+logger = logging.getLogger(__name__)
+
+# Results hold member data, so the default directory is private to this user
+CACHE_DIR = os.getenv("DBT_SL_CACHE_DIR", "").strip() or os.path.join(
+    tempfile.gettempdir(),
+    f"dbt-sl-result-cache-{os.getuid()}" if hasattr(os, "getuid") else "dbt-sl-result-cache",
+)
+CACHE_TTL = float(os.getenv("DBT_SL_CACHE_TTL", "900"))
+CACHE_MAX_BYTES = int(os.getenv("DBT_SL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Seconds between full scans of the directory for eviction; in between, only
+# this process's writes are counted against the byte budget
+EVICT_INTERVAL = 60.0
+
+SQL_METADATA_KEY = b"dbt_sl_sql"
+SUFFIX = ".arrow"
+
+
+def cache_key(tenant: str, fingerprint: str) -> str:
+    """Combine a tenant and a query fingerprint into a file-safe cache key."""
+    return hashlib.sha256(f"{tenant}\x00{fingerprint}".encode("utf-8")).hexdigest()
+
+
+def _private_directory(directory: Path) -> None:
+    """
+    Create ``directory`` readable by this user only, or check an existing one.
+
+    Raises:
+        PermissionError: If the directory is a symlink, belongs to another
+            user or cannot be made private
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    stat = directory.lstat()
+    if directory.is_symlink() or stat.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {directory} is a symlink or not owned by this user")
+    if stat.st_mode & 0o077:
+        directory.chmod(0o700)
+
+
+class ResultCache:
+    """
+    Disk-backed cache of query results stored as Arrow IPC files.
+
+    Entries are shared by every process pointing at the same directory, so
+    Streamlit replicas and restarts reuse each other's results.  A file's
+    modification time records when it was written (for the TTL) and its
+    access time records when it was last read (for LRU eviction once the
+    directory exceeds ``max_bytes``).  Reads are memory-mapped.  The
+    directory must belong to the current user and is made private to it.
+    """
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIR,
+        ttl: float = CACHE_TTL,
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        _private_directory(self.directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Bytes in the directory as of the last scan plus this process's writes
+        self._total_bytes: Optional[int] = None
+        self._scanned_at = 0.0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Optional[Tuple[pa.Table, Optional[str]]]:
+        """Return the cached table and compiled SQL for ``key``, if fresh."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Unable to read cache entry key=%s error=%s", key, e)
+            return None
+
+        now = time.time()
+        if now - stat.st_mtime > self.ttl:
+            self._unlink(path)
+            return None
+
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            os.utime(path, (now, stat.st_mtime))
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Discarding unreadable cache entry key=%s error=%s", key, e)
+            self._unlink(path)
+            return None
+
+        metadata = table.schema.metadata or {}
+        sql = metadata.get(SQL_METADATA_KEY)
+        table = table.replace_schema_metadata(
+            {k: v for k, v in metadata.items() if k != SQL_METADATA_KEY} or None
+        )
+        return table, sql.decode("utf-8") if sql is not None else None
+
+    def put(self, key: str, table: pa.Table, sql: Optional[str] = None) -> None:
+        """
+        Write ``table`` to the cache.
+
+        Entries are evicted once this process's count of the directory's
+        size exceeds the byte budget, or every ``EVICT_INTERVAL`` seconds.
+        """
+        metadata = dict(table.schema.metadata or {})
+        if sql is not None:
+            metadata[SQL_METADATA_KEY] = sql.encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            size = tmp_path.stat().st_size
+            try:
+                size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Unable to write cache entry key=%s error=%s", key, e)
+            self._unlink(tmp_path)
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            due = (
+                self._total_bytes is None
+                or self._total_bytes > self.max_bytes
+                or time.monotonic() - self._scanned_at > EVICT_INTERVAL
+            )
+        if due:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones over budget."""
+        with self._lock:
+            now = time.time()
+            entries = []
+            total = 0
+            for path in self.directory.glob(f"*{SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    self._unlink(path)
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._unlink(path)
+                total -= size
+            self._total_bytes = total
+            self._scanned_at = time.monotonic()
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            self._unlink(path)
+        with self._lock:
+            self._total_bytes = None
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Unable to remove cache entry path=%s error=%s", path, e)
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> ResultCache:
+    """
+    Return the process-wide result cache.
+
+    Falls back to a new private temporary directory if ``CACHE_DIR`` is not
+    safe to use.
+    """
+    try:
+        cache = ResultCache()
+    except PermissionError as e:
+        logger.error("Not using result cache dir=%s error=%s", CACHE_DIR, e)
+        cache = ResultCache(tempfile.mkdtemp(prefix="dbt-sl-result-cache-"))
+    logger.info(
+        "Opened result cache dir=%s ttl=%s max_bytes=%s",
+        cache.directory,
+        cache.ttl,
+        cache.max_bytes,
+    )
+    return cache
@@ -0,0 +1,342 @@
+# stdlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# third party
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+# first party
+from planner import row_domain, split_result
+from predicates import TimePredicate, fixed_filters, subsumed_filters
+from schema import Query
+
+
+# Measure aggregations whose results can be aggregated again, as the Arrow
+# aggregation to apply and its min_count (counts of no rows are 0, not null)
+REAGGREGATIONS = {
+    "SUM": ("sum", 1),
+    "SUM_BOOLEAN": ("sum", 1),
+    "COUNT": ("sum", 0),
+    "MIN": ("min", 1),
+    "MAX": ("max", 1),
+}
+
+# Grain -> the grains its periods nest in exactly (weeks do not nest in months)
+ROLLS_UP_TO = {
+    "HOUR": {"HOUR", "DAY", "WEEK", "MONTH", "QUARTER", "YEAR"},
+    "DAY": {"DAY", "WEEK", "MONTH", "QUARTER", "YEAR"},
+    "WEEK": {"WEEK"},
+    "MONTH": {"MONTH", "QUARTER", "YEAR"},
+    "QUARTER": {"QUARTER", "YEAR"},
+    "YEAR": {"YEAR"},
+}
+
+# Coarsest first, for picking the coarsest grain that serves several requests
+GRAINS = ("YEAR", "QUARTER", "MONTH", "WEEK", "DAY", "HOUR")
+
+INDEX_MAX_ENTRIES = 4096
+# Most dimensions a cube query may group by, which bounds its row count
+CUBE_MAX_DIMENSIONS = 4
+
+Aggregation = Tuple[str, int]
+
+
+def reaggregations(
+    metric_dict: Mapping[str, Dict], names: Iterable[str]
+) -> Dict[str, Aggregation]:
+    """
+    Return how to re-aggregate each safe metric in ``names``.
+
+    Only simple metrics over a single SUM, COUNT, MIN or MAX measure are
+    safe; averages, distinct counts, ratios, derived and cumulative metrics
+    are left out.
+    """
+    aggregations = {}
+    for name in names:
+        metric = metric_dict.get(name) or {}
+        measures = metric.get("measures") or []
+        if (metric.get("type") or "").upper() != "SIMPLE" or len(measures) != 1:
+            continue
+        aggregation = REAGGREGATIONS.get((measures[0].get("agg") or "").upper())
+        if aggregation is not None:
+            aggregations[name] = aggregation
+    return aggregations
+
+
+_IndexEntry = Tuple[Query, FrozenSet[str], FrozenSet[str]]
+
+
+def _group_by_names(query: Query) -> FrozenSet[str]:
+    return frozenset(g.name for g in query.groupBy or [])
+
+
+class ResultIndex:
+    """
+    Remember which query each result cache entry answers, per tenant.
+
+    Lets a miss be answered from a cached result of a related query.  Only
+    entries written or read by this process are known; the least recently
+    added are forgotten beyond ``max_entries``.  Entries are bucketed by
+    tenant and by their filters other than time ranges, which a source must
+    share with any query derived from it, so a lookup only sees the few
+    entries for the same member or filter selection.
+    """
+
+    def __init__(self, max_entries: int = INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # cache_id -> bucket, in the order added
+        self._entries: "OrderedDict[str, Tuple]" = OrderedDict()
+        # bucket -> cache_id -> (query, metric names, group-by names)
+        self._buckets: Dict[Tuple, "OrderedDict[str, _IndexEntry]"] = {}
+
+    @staticmethod
+    def _bucket(tenant: str, query: Query) -> Tuple:
+        return tenant, fixed_filters(query.canonical.get("where") or [])
+
+    def _remove(self, cache_id: str) -> None:
+        bucket = self._entries.pop(cache_id, None)
+        if bucket is None:
+            return
+        entries = self._buckets[bucket]
+        entries.pop(cache_id, None)
+        if not entries:
+            del self._buckets[bucket]
+
+    def add(self, tenant: str, cache_id: str, query: Query) -> None:
+        bucket = self._bucket(tenant, query)
+        entry = (query, frozenset(query.metric_names), _group_by_names(query))
+        with self._lock:
+            self._remove(cache_id)
+            self._entries[cache_id] = bucket
+            self._buckets.setdefault(bucket, OrderedDict())[cache_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, cache_id: str) -> None:
+        with self._lock:
+            self._remove(cache_id)
+
+    def sources(self, tenant: str, query: Query) -> List[Tuple[str, Query]]:
+        """
+        Return ``(cache_id, query)`` for this tenant's entries that may answer
+        ``query``, most recent first.
+
+        Candidates share ``query``'s filters other than time ranges and have
+        all of its metrics and dimensions; ``derivable`` decides the rest.
+        """
+        metrics, dimensions = set(query.metric_names), _group_by_names(query)
+        with self._lock:
+            entries = list(self._buckets.get(self._bucket(tenant, query), {}).items())
+        return [
+            (key, source)
+            for key, (source, source_metrics, source_dimensions) in reversed(entries)
+            if metrics <= source_metrics and dimensions <= source_dimensions
+        ]
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_index() -> ResultIndex:
+    """Return the process-wide index of cached results."""
+    return ResultIndex()
+
+
+def _dimensions(query: Query) -> Optional[Dict[str, Optional[str]]]:
+    """Map group-by name to grain, or ``None`` if a dimension repeats."""
+    names = Counter(g.name for g in query.groupBy or [])
+    if any(n > 1 for n in names.values()):
+        return None
+    return {g.name: g.grain.upper() if g.grain else None for g in query.groupBy or []}
+
+
+def _local_filters(source: Query, target: Query) -> Optional[List[TimePredicate]]:
+    """
+    Return the time ranges to apply to ``source``'s rows to match
+    ``target``'s filters, or ``None`` if that is not possible.
+
+    Each range's dimension must be grouped by in ``source`` at the range's
+    grain or finer, so that every row lies wholly inside or outside it.
+    """
+    filters = subsumed_filters(
+        source.canonical.get("where") or [], target.canonical.get("where") or []
+    )
+    source_dims = _dimensions(source)
+    if filters is None or source_dims is None:
+        return None
+    for predicate in filters:
+        grain = source_dims.get(predicate.dimension)
+        if grain is None or predicate.grain not in ROLLS_UP_TO.get(grain, ()):
+            return None
+    return filters
+
+
+def derivable(
+    source: Query,
+    target: Query,
+    aggregations: Mapping[str, Aggregation],
+    metric_dict: Mapping[str, Dict],
+) -> bool:
+    """
+    Whether ``target`` can be computed from the complete result of ``source``.
+
+    ``source`` must have no limit, the same filters or wider time ranges it
+    groups by finely enough to narrow locally, every metric of ``target``
+    and every dimension of ``target`` at the same or a finer grain.  Extra
+    metrics in ``source`` must share a ``planner.row_domain`` with
+    ``target``'s.  Rolling up to a coarser grain or dropping dimensions
+    also needs every metric in ``aggregations``.
+    """
+    if source.limit:
+        return False
+    source_canonical, target_canonical = source.canonical, target.canonical
+    if _local_filters(source, target) is None:
+        return False
+    source_metrics = set(source_canonical["metrics"])
+    if not set(target_canonical["metrics"]) <= source_metrics:
+        return False
+    if len(target_canonical["metrics"]) < len(source_metrics) and (
+        row_domain(metric_dict, source_metrics) is None
+    ):
+        return False
+    source_dims, target_dims = _dimensions(source), _dimensions(target)
+    if source_dims is None or target_dims is None or not target_dims.keys() <= source_dims.keys():
+        return False
+
+    rolled = target_dims.keys() != source_dims.keys()
+    for name, grain in target_dims.items():
+        source_grain = source_dims[name]
+        if source_grain == grain:
+            continue
+        if source_grain is None or grain is None or grain not in ROLLS_UP_TO[source_grain]:
+            return False
+        rolled = True
+    return not rolled or all(m in aggregations for m in target_canonical["metrics"])
+
+
+def _regrained(column: str, old: str, new: str) -> str:
+    suffix = column[-len(old):]
+    return column[: -len(old)] + (new.lower() if suffix.islower() else new.upper())
+
+
+def order_and_limit(table: pa.Table, query: Query) -> pa.Table:
+    """Apply ``query``'s ``orderBy`` and ``limit`` to a complete result."""
+    if query.orderBy:
+        columns = {c.lower(): c for c in table.column_names}
+        keys = []
+        for order in query.orderBy:
+            item = order.metric or order.groupBy
+            name = item.name
+            if getattr(item, "grain", None):
+                name = f"{name}__{item.grain.lower()}"
+            column = columns.get(name.lower())
+            if column is not None:
+                keys.append((column, "descending" if order.descending else "ascending"))
+        if keys:
+            table = table.sort_by(keys)
+    if query.limit:
+        table = table.slice(0, query.limit)
+    return table
+
+
+def derive(
+    table: pa.Table, source: Query, target: Query, aggregations: Mapping[str, Aggregation]
+) -> pa.Table:
+    """
+    Compute ``target``'s result from ``source``'s, which must be ``derivable``.
+
+    Rows outside ``target``'s narrower time ranges are filtered out, time
+    dimensions are truncated to ``target``'s grains, dimensions it does not
+    group by are dropped and metrics are re-aggregated over the coarser
+    groups with a vectorized Arrow group-by.
+    """
+    source_dims = _dimensions(source)
+    filters = _local_filters(source, target)
+    if filters:
+        columns = {c.lower(): c for c in table.column_names}
+        for predicate in filters:
+            name = f"{predicate.dimension}__{source_dims[predicate.dimension]}"
+            table = table.filter(predicate.mask(table[columns[name.lower()]]))
+
+    target_names = {g.name for g in target.groupBy or []}
+    shaped = source.model_copy(
+        update={
+            "metrics": target.metrics,
+            "groupBy": [g for g in source.groupBy or [] if g.name in target_names] or None,
+            "orderBy": None,
+            "limit": None,
+        }
+    )
+    table = split_result(table, shaped)
+    columns = {c.lower(): c for c in table.column_names}
+
+    keys, rolled = [], len(target_names) < len(source_dims)
+    for g in target.groupBy or []:
+        grain = g.grain.upper() if g.grain else None
+        source_grain = source_dims[g.name]
+        column = columns[(f"{g.name}__{source_grain}" if source_grain else g.name).lower()]
+        if grain != source_grain:
+            name = _regrained(column, source_grain, grain)
+            truncated = pc.floor_temporal(table[column], unit=grain.lower())
+            table = table.set_column(table.column_names.index(column), name, truncated)
+            column, rolled = name, True
+        keys.append(column)
+
+    if rolled:
+        metrics = []
+        for m in target.metric_names:
+            function, min_count = aggregations[m]
+            options = pc.ScalarAggregateOptions(min_count=min_count)
+            metrics.append((columns[m.lower()], function, options))
+        grouped = table.group_by(keys, use_threads=False).aggregate(metrics)
+        names = {f"{column}_{function}": column for column, function, _ in metrics}
+        grouped = grouped.rename_columns([names.get(n, n) for n in grouped.column_names])
+        table = grouped.select(table.column_names)
+    return order_and_limit(table, target)
+
+
+def cube_query(
+    queries: Sequence[Query], max_dimensions: int = CUBE_MAX_DIMENSIONS
+) -> Optional[Query]:
+    """
+    Return one query from whose result every query in ``queries`` may be derived.
+
+    The cube asks for the union of the metrics grouped by the union of the
+    dimensions, each time dimension at the coarsest grain that rolls up to
+    every grain requested.  Returns ``None`` if the filters differ, a
+    dimension is requested both with and without a grain or the cube would
+    group by more than ``max_dimensions``.  Whether the metrics allow the
+    derivation is still up to ``derivable``.
+    """
+    if not queries:
+        return None
+    where = queries[0].canonical.get("where")
+    metrics, grains = {}, {}
+    for query in queries:
+        if query.canonical.get("where") != where:
+            return None
+        for m in query.metrics:
+            metrics.setdefault(m.name, m)
+        for g in query.groupBy or []:
+            grains.setdefault(g.name, set()).add(g.grain.upper() if g.grain else None)
+    if len(grains) > max_dimensions:
+        return None
+
+    group_by = []
+    for name, requested in grains.items():
+        if requested == {None}:
+            group_by.append({"name": name})
+            continue
+        if None in requested:
+            return None
+        grain = next((g for g in GRAINS if requested <= ROLLS_UP_TO[g]), None)
+        if grain is None:
+            return None
+        group_by.append({"name": name, "grain": grain})
+    return Query(
+        metrics=list(metrics.values()),
+        groupBy=group_by or None,
+        where=queries[0].where,
+    )
@@ -0,0 +1,161 @@
+# stdlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterator
+
+# third party
+import streamlit as st
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ACTIVE_QUERIES = int(os.getenv("DBT_SL_MAX_ACTIVE_QUERIES", "16"))
+WAIT_SAMPLES = 500
+
+
+class Priority(IntEnum):
+    """Scheduling class of a query; lower values are admitted first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a query is not admitted before its timeout."""
+
+
+class _Ticket:
+    __slots__ = ("tenant", "priority", "weight", "enqueued", "admitted")
+
+    def __init__(self, tenant: str, priority: Priority, weight: int):
+        self.tenant = tenant
+        self.priority = priority
+        self.weight = weight
+        self.enqueued = time.monotonic()
+        self.admitted = threading.Event()
+
+
+class QueryScheduler:
+    """
+    Process-wide admission control for warehouse queries.
+
+    At most ``max_active`` query slots are in use at once.  Waiting work is
+    admitted by priority class first, then round-robin across tenants within
+    a class, so one busy tenant cannot starve the others.  A ticket may
+    weigh several slots, e.g. a batch of dashboard panels.
+    """
+
+    def __init__(self, max_active: int = MAX_ACTIVE_QUERIES):
+        self.max_active = max_active
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Ticket]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._admitted = 0
+
+    @contextmanager
+    def slot(
+        self,
+        tenant: str,
+        priority: Priority = Priority.INTERACTIVE,
+        weight: int = 1,
+        timeout: float = None,
+    ) -> Iterator[float]:
+        """
+        Hold query slots for the duration of the block.
+
+        Yields:
+            Seconds the caller waited to be admitted
+
+        Raises:
+            AdmissionTimeout: If not admitted within ``timeout`` seconds
+        """
+        ticket = _Ticket(tenant, priority, max(1, min(weight, self.max_active)))
+        with self._lock:
+            self._queues[priority].setdefault(tenant, deque()).append(ticket)
+            self._dispatch()
+
+        if not ticket.admitted.wait(timeout):
+            with self._lock:
+                if not ticket.admitted.is_set():
+                    self._remove(ticket)
+                    raise AdmissionTimeout(
+                        f"Query was not admitted within {timeout:.0f} seconds"
+                    )
+
+        waited = time.monotonic() - ticket.enqueued
+        if waited > 0.5:
+            logger.info(
+                "Query admitted after waiting tenant=%s priority=%s waited=%.2fs",
+                tenant[:40],
+                priority.name,
+                waited,
+            )
+        try:
+            yield waited
+        finally:
+            with self._lock:
+                self._active -= ticket.weight
+                self._dispatch()
+
+    def _remove(self, ticket: _Ticket) -> None:
+        queue = self._queues[ticket.priority].get(ticket.tenant)
+        if queue is not None:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.priority][ticket.tenant]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiting tickets while slots are free.  Caller holds the lock."""
+        for priority in Priority:
+            tenants = self._queues[priority]
+            while tenants:
+                tenant, queue = next(iter(tenants.items()))
+                ticket = queue[0]
+                if self._active + ticket.weight > self.max_active:
+                    return
+                queue.popleft()
+                if queue:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                self._active += ticket.weight
+                self._admitted += 1
+                self._waits.append(time.monotonic() - ticket.enqueued)
+                ticket.admitted.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and recent admission wait times."""
+        with self._lock:
+            depth = {
+                priority.name.lower(): sum(len(q) for q in tenants.values())
+                for priority, tenants in self._queues.items()
+            }
+            waits = sorted(self._waits)
+            return {
+                "active_slots": self._active,
+                "max_active": self.max_active,
+                "queue_depth": sum(depth.values()),
+                "queue_depth_by_priority": depth,
+                "queued_tenants": len(
+                    {t for tenants in self._queues.values() for t in tenants}
+                ),
+                "admitted": self._admitted,
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "max_wait": waits[-1] if waits else 0.0,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_scheduler() -> QueryScheduler:
+    """Return the process-wide query scheduler."""
+    return QueryScheduler()
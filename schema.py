@@ -1,6 +1,10 @@
 # stdlib
+import hashlib
+import json
+import re
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 # third party
 import streamlit as st
@@ -30,6 +34,52 @@ GQL_MAP: Dict = {
 }
 
 
+_WHITESPACE = re.compile(r"\s+")
+_JINJA_OPEN = re.compile(r"\{\{\s*")
+_JINJA_CLOSE = re.compile(r"\s*\}\}")
+_TEMPLATE_CALL = re.compile(r"\b(Dimension|TimeDimension|Entity)\(([^)]*)\)")
+_TIME_DIMENSION_GRAIN = re.compile(r"(TimeDimension\('[^']*', ')([A-Za-z]+)(')")
+# A single-quoted SQL literal, with '' as an escaped quote
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_PLACEHOLDER = re.compile(r"'\x00(\d+)'")
+
+
+@lru_cache(maxsize=4096)
+def normalize_where_sql(sql: str) -> str:
+    """
+    Normalize a where template so formatting differences do not matter.
+
+    Collapses whitespace, pads ``{{ ... }}`` and the arguments of
+    ``Dimension(...)``-style calls consistently and upper-cases the grain
+    argument of ``TimeDimension(...)``.  Quoted literals are left as they
+    are, so filters on different values never normalize to the same text.
+    Results are memoized.
+
+    >>> normalize_where_sql("{{Dimension( 'plan__name' )}}  =  'Acme  Health'")
+    "{{ Dimension('plan__name') }} = 'Acme  Health'"
+    >>> normalize_where_sql("{{ TimeDimension('metric_time','day') }} >= '2024-01-01'")
+    "{{ TimeDimension('metric_time', 'DAY') }} >= '2024-01-01'"
+    """
+    literals: List[str] = []
+
+    def stash(match: re.Match) -> str:
+        literals.append(match.group(0))
+        return f"'\x00{len(literals) - 1}'"
+
+    sql = _LITERAL.sub(stash, sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _JINJA_OPEN.sub("{{ ", sql)
+    sql = _JINJA_CLOSE.sub(" }}", sql)
+    sql = _TEMPLATE_CALL.sub(
+        lambda m: f"{m.group(1)}({', '.join(a.strip() for a in m.group(2).split(','))})",
+        sql,
+    )
+    sql = _LITERAL_PLACEHOLDER.sub(lambda m: literals[int(m.group(1))], sql)
+    return _TIME_DIMENSION_GRAIN.sub(
+        lambda m: m.group(1) + m.group(2).upper() + m.group(3), sql
+    )
+
+
 class TimeGranularity(str, Enum):
     hour = "HOUR"
     day = "DAY"
@@ -136,6 +186,46 @@ class Query(BaseModel):
     def has_multiple_metrics(self):
         return len(self.metrics) > 1
 
+    @property
+    def canonical(self) -> Dict[str, Any]:
+        """
+        Normalized form of the query used to recognize equivalent queries.
+
+        Metrics, group bys and where clauses are sorted, where templates are
+        whitespace-normalized, grains are upper-cased and unset or default
+        fields are dropped.  ``orderBy`` keeps its order as it is significant.
+        Computed on every access, so it always reflects the current fields.
+        """
+        canonical: Dict[str, Any] = {
+            "metrics": sorted(m.name for m in self.metrics),
+        }
+        if self.groupBy:
+            canonical["groupBy"] = sorted(
+                ([g.name, g.grain.upper() if g.grain else None] for g in self.groupBy),
+                key=lambda g: (g[0], g[1] or ""),
+            )
+        if self.where:
+            canonical["where"] = sorted(normalize_where_sql(w.sql) for w in self.where)
+        if self.orderBy:
+            order_by = []
+            for o in self.orderBy:
+                if o.metric is not None:
+                    item = ["metric", o.metric.name, None]
+                else:
+                    grain = o.groupBy.grain.upper() if o.groupBy.grain else None
+                    item = ["groupBy", o.groupBy.name, grain]
+                order_by.append(item + [bool(o.descending)])
+            canonical["orderBy"] = order_by
+        if self.limit:
+            canonical["limit"] = self.limit
+        return canonical
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable hash of ``canonical``; equal for logically identical queries."""
+        text = json.dumps(self.canonical, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
     @property
     def used_inputs(self) -> List[str]:
         inputs = []
@@ -190,14 +280,24 @@ from {{{{
         """
         return sql
 
-    @property
-    def gql(self) -> str:
-        query = GRAPHQL_QUERIES["create_query"]
+    def gql_inputs(self, suffix: str = "") -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Return the createQuery kwargs and variable declarations for this query.
+
+        ``suffix`` is appended to every variable name so several queries can
+        share one GraphQL document without their variables colliding.
+        """
         kwargs = {"environmentId": "$environmentId"}
         arguments = {"environmentId": "BigInt!"}
         for input in self.used_inputs:
-            kwargs[input] = GQL_MAP[input]["kwarg"]
-            arguments[input] = GQL_MAP[input]["argument"]
+            kwargs[input] = GQL_MAP[input]["kwarg"] + suffix
+            arguments[input + suffix] = GQL_MAP[input]["argument"]
+        return kwargs, arguments
+
+    @property
+    def gql(self) -> str:
+        query = GRAPHQL_QUERIES["create_query"]
+        kwargs, arguments = self.gql_inputs()
         return query.format(
             **{
                 "arguments": ", ".join(f"${k}: {v}" for k, v in arguments.items()),
@@ -250,6 +350,37 @@ from {{{{
         return variables
 
 
+def batch_gql(queries: Sequence[Query]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Render several queries as a single aliased ``createQuery`` mutation.
+
+    Each query becomes a field aliased ``q<index>`` whose variables are
+    suffixed with ``_<index>``.
+
+    Returns:
+        The GraphQL document and its variables (without ``environmentId``)
+    """
+    arguments = {"environmentId": "BigInt!"}
+    variables: Dict[str, Any] = {}
+    fields = []
+    for i, query in enumerate(queries):
+        suffix = f"_{i}"
+        kwargs, query_arguments = query.gql_inputs(suffix)
+        arguments.update(query_arguments)
+        variables.update({f"{k}{suffix}": v for k, v in query.variables.items()})
+        fields.append(
+            GRAPHQL_QUERIES["create_query_field"].format(
+                alias=f"q{i}",
+                kwargs=",\n    ".join(f"{k}: {v}" for k, v in kwargs.items()),
+            )
+        )
+    document = GRAPHQL_QUERIES["create_query_batch"].format(
+        arguments=", ".join(f"${k}: {v}" for k, v in arguments.items()),
+        fields="\n".join(fields),
+    )
+    return document, variables
+
+
 class QueryLoader:
     def __init__(self, state: st.session_state):
         self.state = state
@@ -0,0 +1,128 @@
+# stdlib
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+# third party
+import pyarrow as pa
+
+
+ARROW_RESULT_KEY = "arrowResult"
+_MARKER = f'"{ARROW_RESULT_KEY}"'.encode("utf-8")
+_WHITESPACE = b" \t\r\n"
+
+
+class ArrowResultExtractor:
+    """
+    Incrementally parse a GraphQL JSON response, decoding ``arrowResult``
+    strings as they stream in.
+
+    Everything except the base64 payloads is copied into a small skeleton
+    document.  Each payload is decoded in 4-byte aligned chunks straight into
+    an Arrow buffer, and its place in the skeleton is taken by an index into
+    the decoded tables.  Peak memory is therefore about one copy of the
+    decoded result, rather than the response text, the parsed string and the
+    decoded bytes all at once.
+    """
+
+    def __init__(self):
+        self._skeleton = bytearray()
+        self._tables: List[Optional[pa.Table]] = []
+        self._mode = "scan"
+        self._carry = b""
+        self._tail = b""
+        self._sink: Optional[pa.BufferOutputStream] = None
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        data = self._carry + chunk
+        self._carry = b""
+        pos = 0
+        while pos < len(data):
+            if self._mode == "scan":
+                i = data.find(_MARKER, pos)
+                if i == -1:
+                    # Hold back a possible partial marker for the next chunk
+                    cut = max(pos, len(data) - len(_MARKER) + 1)
+                    self._skeleton += data[pos:cut]
+                    self._carry = data[cut:]
+                    return
+                end = i + len(_MARKER)
+                self._skeleton += data[pos:end]
+                pos = end
+                self._mode = "value"
+            elif self._mode == "value":
+                byte = data[pos : pos + 1]
+                if byte in _WHITESPACE or byte == b":":
+                    self._skeleton += byte
+                    pos += 1
+                elif byte == b'"':
+                    self._sink = pa.BufferOutputStream()
+                    self._mode = "string"
+                    pos += 1
+                else:
+                    # null or an unexpected value; copy it verbatim
+                    self._mode = "scan"
+            else:
+                j = data.find(b'"', pos)
+                self._decode(data[pos : len(data) if j == -1 else j])
+                if j == -1:
+                    return
+                self._finish_string()
+                pos = j + 1
+                self._mode = "scan"
+
+    def _decode(self, segment: bytes) -> None:
+        segment = self._tail + segment
+        hold = b""
+        if segment.endswith(b"\\"):
+            # An escape sequence is split across chunks
+            segment, hold = segment[:-1], b"\\"
+        segment = segment.replace(b"\\/", b"/")
+        usable = len(segment) - len(segment) % 4
+        if usable:
+            self._sink.write(base64.b64decode(segment[:usable]))
+        self._tail = segment[usable:] + hold
+
+    def _finish_string(self) -> None:
+        if self._tail:
+            self._sink.write(base64.b64decode(self._tail))
+            self._tail = b""
+        buffer = self._sink.getvalue()
+        self._sink = None
+        if buffer.size:
+            with pa.ipc.open_stream(buffer) as reader:
+                table = pa.Table.from_batches(reader, reader.schema)
+        else:
+            table = None
+        self._skeleton += str(len(self._tables)).encode("ascii")
+        self._tables.append(table)
+
+    def result(self) -> Dict[str, Any]:
+        """Return the parsed document with ``pyarrow.Table`` results in place."""
+        if self._mode != "scan":
+            raise ValueError("Response ended inside an arrowResult value")
+        self._skeleton += self._carry
+        self._carry = b""
+        return self._restore(json.loads(bytes(self._skeleton)))
+
+    def _restore(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == ARROW_RESULT_KEY and isinstance(value, int):
+                    node[key] = self._tables[value]
+                else:
+                    self._restore(value)
+        elif isinstance(node, list):
+            for item in node:
+                self._restore(item)
+        return node
+
+
+def decode_json_stream(chunks: Iterable[bytes]) -> Dict[str, Any]:
+    """Parse a streamed GraphQL response, decoding ``arrowResult`` values."""
+    extractor = ArrowResultExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.result()
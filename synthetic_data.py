@@ -0,0 +1,336 @@
+"""
+Seeded generator for synthetic members, dependents, plans and claims.
+
+Scales ``data/members.csv`` to any number of members while keeping its
+columns, so the output can feed ``helpers.get_member_roster`` (via
+``MEMBER_ROSTER_PATH``) and the local Semantic Layer emulator.  Enrollment
+is skewed towards the largest company, families share a plan, and claim
+volume, providers and amounts follow long-tailed distributions.
+
+    python synthetic_data.py --members 1000000 --seed 7 --out data/synthetic
+"""
+
+# stdlib
+import argparse
+import datetime as dt
+import logging
+from pathlib import Path
+from typing import Tuple
+
+# third party
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+
+logger = logging.getLogger(__name__)
+
+MEMBERS_CSV = Path(__file__).parent / "data" / "members.csv"
+FIRST_MEMBER_ID = 1_000_000
+
+# (company_id, email domain, employee id prefix, share of enrollment)
+COMPANIES = [
+    (1001, "techcorp.com", "TC", 0.55),
+    (1002, "retailplus.com", "RP", 0.30),
+    (1003, "manufacturingco.com", "MC", 0.15),
+]
+DEPARTMENTS = {
+    1001: ["Engineering", "Product", "Sales", "Marketing", "Finance", "HR"],
+    1002: ["Store Management", "Customer Service", "Logistics", "HR", "Merchandising"],
+    1003: ["Operations", "Quality Control", "Engineering", "Safety", "Maintenance"],
+}
+MEDIAN_SALARY = {1001: 115_000, 1002: 52_000, 1003: 68_000}
+# (plan_id, company_id, plan name, deductible, out-of-pocket maximum)
+PLANS = [
+    (2001, 1001, "TechCorp PPO", 500, 3_000),
+    (2002, 1001, "TechCorp HDHP", 2_000, 6_000),
+    (2003, 1002, "RetailPlus HMO", 1_000, 5_000),
+    (2004, 1002, "RetailPlus Basic", 3_000, 8_000),
+    (2005, 1003, "ManufacturingCo PPO", 750, 4_000),
+    (2006, 1003, "ManufacturingCo HMO", 1_500, 6_000),
+]
+
+FIRST_NAMES = {
+    "M": ["James", "Robert", "John", "Michael", "David", "William", "Richard", "Joseph",
+          "Thomas", "Daniel", "Matthew", "Anthony", "Mark", "Steven", "Andrew", "Kevin"],
+    "F": ["Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan",
+          "Jessica", "Sarah", "Karen", "Lisa", "Nancy", "Emily", "Maria", "Laura", "Amy"],
+}
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas",
+    "Taylor", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris",
+    "Clark", "Lewis", "Robinson", "Walker", "Young", "Allen", "King", "Chen", "Nguyen",
+]
+DEPENDENT_COUNTS = np.array([0, 1, 2, 3, 4])
+DEPENDENT_WEIGHTS = np.array([0.45, 0.22, 0.18, 0.10, 0.05])
+
+# Claim type -> (share of claims, lognormal mu of the claim amount)
+CLAIM_TYPES = {
+    "Medical": (0.48, 5.6),
+    "Pharmacy": (0.28, 3.9),
+    "Dental": (0.12, 4.9),
+    "Vision": (0.07, 4.6),
+    "Mental Health": (0.05, 5.0),
+}
+CLAIM_STATUSES = {"Paid": 0.72, "Processing": 0.12, "Pending": 0.09, "Denied": 0.07}
+PROVIDERS = [
+    "Kaiser Permanente", "CVS Pharmacy", "Sutter Health", "Walgreens",
+    "Stanford Health Care", "UCSF Medical Center", "Delta Dental", "One Medical",
+    "Dignity Health", "Rite Aid", "VSP Vision Care", "John Muir Health",
+    "Providence Medical Group", "MinuteClinic", "Headspace Care", "Aspen Dental",
+]
+HISTORY_DAYS = 730
+
+
+def _choice(rng: np.random.Generator, weights, size: int) -> np.ndarray:
+    weights = np.asarray(weights, dtype=float)
+    return rng.choice(len(weights), size=size, p=weights / weights.sum())
+
+
+def _dictionary(indices: np.ndarray, values) -> pa.DictionaryArray:
+    return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(values))
+
+
+def generate_plans() -> pa.Table:
+    """Return the benefit plans offered by each company."""
+    columns = list(zip(*PLANS))
+    return pa.table(
+        {
+            "plan_id": pa.array(columns[0], pa.int64()),
+            "company_id": pa.array(columns[1], pa.int64()),
+            "plan_name": pa.array(columns[2]),
+            "deductible": pa.array(columns[3], pa.int64()),
+            "out_of_pocket_max": pa.array(columns[4], pa.int64()),
+        }
+    )
+
+
+def generate_members(n_members: int, seed: int = 0) -> pa.Table:
+    """
+    Generate ``n_members`` members with the columns of ``data/members.csv``.
+
+    Each employee is followed by their dependents, who share the employee's
+    company, plan, department and last name and point at them through
+    ``dependent_of``.  Emails embed the member id, so they are unique.
+    """
+    rng = np.random.default_rng(seed)
+    # Every family has at least one member, so this many is always enough
+    n_primaries = n_members
+    dependents = DEPENDENT_COUNTS[_choice(rng, DEPENDENT_WEIGHTS, n_primaries)]
+    family = np.repeat(np.arange(n_primaries), dependents + 1)[:n_members]
+    starts = np.concatenate(([0], np.cumsum(dependents + 1)[:-1]))
+    position = np.arange(len(family)) - starts[family]
+    is_primary = position == 0
+
+    member_id = FIRST_MEMBER_ID + np.arange(len(family))
+    primary_company = _choice(rng, [c[3] for c in COMPANIES], n_primaries)
+    company = primary_company[family]
+    company_id = np.array([c[0] for c in COMPANIES])[company]
+
+    plan = np.empty(n_primaries, dtype=np.int64)
+    department = np.empty(n_primaries, dtype=object)
+    for index, (cid, *_rest) in enumerate(COMPANIES):
+        mask = primary_company == index
+        plan[mask] = rng.choice([p[0] for p in PLANS if p[1] == cid], mask.sum(), p=[0.65, 0.35])
+        departments = np.array(DEPARTMENTS[cid], dtype=object)
+        department[mask] = departments[
+            _choice(rng, 1 / np.arange(1, len(departments) + 1), mask.sum())
+        ]
+
+    # Spouses are the first dependent about half of the time; everyone else is a child
+    is_spouse = (position == 1) & (rng.random(n_primaries)[family] < 0.5)
+    primary_gender = _choice(rng, [0.5, 0.5], n_primaries)
+    gender_index = np.where(
+        is_primary, primary_gender[family], np.where(is_spouse, 1 - primary_gender[family], 0)
+    )
+    child = ~is_primary & ~is_spouse
+    gender_index[child] = _choice(rng, [0.5, 0.5], child.sum())
+    gender = np.array(["M", "F"])[gender_index]
+
+    first_names = np.empty(len(family), dtype=object)
+    for index, key in enumerate(("M", "F")):
+        mask = gender_index == index
+        first_names[mask] = np.array(FIRST_NAMES[key], dtype=object)[
+            rng.integers(len(FIRST_NAMES[key]), size=mask.sum())
+        ]
+    last_names = np.array(LAST_NAMES, dtype=object)[
+        rng.integers(len(LAST_NAMES), size=n_primaries)
+    ][family]
+
+    today = dt.date.today()
+    primary_age = rng.integers(22, 65, size=n_primaries)[family]
+    age = np.where(
+        is_primary,
+        primary_age,
+        np.where(is_spouse, np.clip(primary_age + rng.integers(-5, 6, len(family)), 21, 70),
+                 rng.integers(0, 22, len(family))),
+    )
+    date_of_birth = (
+        np.datetime64(today, "D")
+        - (age * 365.25).astype("timedelta64[D]")
+        - rng.integers(0, 365, len(family)).astype("timedelta64[D]")
+    )
+    enrollment = (
+        np.datetime64("2019-01-01")
+        + rng.integers(0, 6 * 365, n_primaries).astype("timedelta64[D]")
+    )[family]
+
+    suffix = np.where(is_primary, "", "D" + position.astype(str).astype(object))
+    employee_id = (
+        np.array([c[2] for c in COMPANIES], dtype=object)[company]
+        + (family + 1).astype(str).astype(object)
+        + suffix
+    )
+    domain = np.array([c[1] for c in COMPANIES], dtype=object)[company]
+    email = (
+        np.char.lower((first_names + "." + last_names).astype(str)).astype(object)
+        + "."
+        + member_id.astype(str).astype(object)
+        + "@"
+        + domain
+    )
+    salary = np.array([MEDIAN_SALARY[c] for c in company_id], dtype=float) * rng.lognormal(
+        0, 0.3, len(family)
+    )
+
+    return pa.table(
+        {
+            "member_id": pa.array(member_id, pa.int64()),
+            "company_id": pa.array(company_id, pa.int64()),
+            "employee_id": pa.array(employee_id.astype(str)),
+            "first_name": pa.array(first_names.astype(str)),
+            "last_name": pa.array(last_names.astype(str)),
+            "email": pa.array(email.astype(str)),
+            "date_of_birth": pa.array(date_of_birth.astype("datetime64[D]")),
+            "gender": pa.array(gender),
+            "plan_id": pa.array(plan[family], pa.int64()),
+            "enrollment_date": pa.array(enrollment.astype("datetime64[D]")),
+            "is_primary": pa.array(is_primary),
+            "dependent_of": pa.array(
+                np.where(is_primary, 0, member_id[starts[family]]), pa.int64(), mask=is_primary
+            ),
+            "department": pa.array(department[family].astype(str)),
+            "annual_salary": pa.array(
+                np.round(salary, -3).astype(np.int64), pa.int64(), mask=~is_primary
+            ),
+        }
+    )
+
+
+def generate_claims(members: pa.Table, claims_per_member: float = 24, seed: int = 0) -> pa.Table:
+    """
+    Generate claims over the last two years for ``members``.
+
+    Claim counts per member are negative-binomial, so a minority of members
+    file most claims; providers follow a Zipf-like popularity curve and
+    amounts are log-normal per claim type.
+    """
+    rng = np.random.default_rng(seed)
+    member_ids = members.column("member_id").to_numpy()
+    company_ids = members.column("company_id").to_numpy()
+
+    dispersion = 1.2
+    counts = rng.negative_binomial(
+        dispersion, dispersion / (dispersion + claims_per_member), len(member_ids)
+    )
+    owner = np.repeat(np.arange(len(member_ids)), counts)
+    n_claims = len(owner)
+
+    claim_type = _choice(rng, [t[0] for t in CLAIM_TYPES.values()], n_claims)
+    mu = np.array([t[1] for t in CLAIM_TYPES.values()])[claim_type]
+    amount = np.round(rng.lognormal(mu, 0.9), 2)
+    status = _choice(rng, list(CLAIM_STATUSES.values()), n_claims)
+    paid_status = list(CLAIM_STATUSES).index("Paid")
+    denied_status = list(CLAIM_STATUSES).index("Denied")
+    paid = np.where(status == paid_status, np.round(amount * rng.uniform(0.6, 0.9, n_claims), 2), 0.0)
+    settled = (status == paid_status) | (status == denied_status)
+    provider = _choice(rng, 1 / np.arange(1, len(PROVIDERS) + 1) ** 1.1, n_claims)
+    claim_date = np.datetime64(dt.date.today(), "D") - rng.integers(
+        0, HISTORY_DAYS, n_claims
+    ).astype("timedelta64[D]")
+    # Paid claims settle a few days to weeks after they are filed
+    paid_date = np.minimum(
+        claim_date + rng.integers(3, 46, n_claims).astype("timedelta64[D]"),
+        np.datetime64(dt.date.today(), "D"),
+    )
+
+    return pa.table(
+        {
+            "claim_id": pa.array(np.arange(1, n_claims + 1), pa.int64()),
+            "member_id": pa.array(member_ids[owner], pa.int64()),
+            "company_id": pa.array(company_ids[owner], pa.int64()),
+            "claim_date": pa.array(claim_date),
+            "claim_type": _dictionary(claim_type, list(CLAIM_TYPES)),
+            "claim_status": _dictionary(status, list(CLAIM_STATUSES)),
+            "provider_name": _dictionary(provider, PROVIDERS),
+            "claim_amount": pa.array(amount),
+            "paid_by_insurance": pa.array(paid),
+            "member_responsibility": pa.array(np.where(settled, np.round(amount - paid, 2), 0.0)),
+            "paid_date": pa.array(paid_date, mask=status != paid_status),
+        }
+    )
+
+
+def load_base_members(path: Path = MEMBERS_CSV) -> pa.Table:
+    """Read ``data/members.csv`` with the column types the generator produces."""
+    return pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={
+                "date_of_birth": pa.date32(),
+                "enrollment_date": pa.date32(),
+                "dependent_of": pa.int64(),
+                "annual_salary": pa.int64(),
+            },
+            true_values=["TRUE", "true"],
+            false_values=["FALSE", "false"],
+        ),
+    )
+
+
+def scale_members(n_members: int, seed: int = 0, base: Path = MEMBERS_CSV) -> pa.Table:
+    """Return the demo roster followed by generated members, ``n_members`` in total."""
+    members = load_base_members(base)
+    extra = n_members - members.num_rows
+    if extra <= 0:
+        return members.slice(0, n_members)
+    generated = generate_members(extra, seed).cast(members.schema)
+    return pa.concat_tables([members, generated])
+
+
+def write_dataset(directory: Path, members: pa.Table, claims: pa.Table) -> None:
+    """Write ``members.csv``, ``plans.csv`` and ``claims.parquet`` to ``directory``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    pa_csv.write_csv(members, directory / "members.csv")
+    pa_csv.write_csv(generate_plans(), directory / "plans.csv")
+    pq.write_table(claims, directory / "claims.parquet")
+
+
+def load_dataset(directory: Path) -> Tuple[pa.Table, pa.Table]:
+    """Read the members and claims written by ``write_dataset``."""
+    directory = Path(directory)
+    return load_base_members(directory / "members.csv"), pq.read_table(directory / "claims.parquet")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic members and claims")
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--claims-per-member", type=float, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("data") / "synthetic")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    members = scale_members(args.members, args.seed)
+    claims = generate_claims(members, args.claims_per_member, args.seed)
+    write_dataset(args.out, members, claims)
+    logger.info(
+        "Wrote members=%s claims=%s to %s", members.num_rows, claims.num_rows, args.out
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# stdlib
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# third party
+import streamlit as st
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+except ImportError:
+    trace = None
+
+
+logger = logging.getLogger(__name__)
+
+# Serve Prometheus text-format metrics on this port (0 disables the endpoint)
+METRICS_PORT = int(os.getenv("DBT_SL_METRICS_PORT", "0"))
+# Interface the metrics endpoint binds to; its labels name tenants, so it is
+# local-only unless opened up, e.g. "0.0.0.0" for an in-cluster scraper
+METRICS_HOST = os.getenv("DBT_SL_METRICS_HOST", "").strip() or "127.0.0.1"
+# Spans are exported over OTLP/HTTP when this is set and OpenTelemetry is installed
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").strip()
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "dbt-sl-portal")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Name -> (type, help) for every metric the portal records
+METRICS = {
+    "dbt_sl_span_duration_seconds": (
+        "histogram",
+        "Time spent in each instrumented Semantic Layer client step.",
+    ),
+    "dbt_sl_queue_wait_seconds": (
+        "histogram",
+        "Time spent waiting for the tenant rate limiter or the query scheduler.",
+    ),
+    "dbt_sl_transfer_seconds": (
+        "histogram",
+        "Time spent downloading and decoding GraphQL response bodies.",
+    ),
+    "dbt_sl_requests_total": ("counter", "GraphQL requests by operation and HTTP status."),
+    "dbt_sl_request_retries_total": ("counter", "GraphQL requests retried by operation."),
+    "dbt_sl_request_bytes_total": ("counter", "GraphQL request body bytes sent."),
+    "dbt_sl_response_bytes_total": ("counter", "GraphQL response body bytes received."),
+    "dbt_sl_query_polls_total": ("counter", "Query status polls by the status returned."),
+    "dbt_sl_query_status_transitions_total": (
+        "counter",
+        "Queries observed entering each status.",
+    ),
+    "dbt_sl_result_cache_lookups_total": ("counter", "Result cache lookups by outcome."),
+    "dbt_sl_result_rows_total": ("counter", "Result rows produced by each step."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms rendered in the Prometheus text format.
+
+    Metric names must be declared in ``METRICS``; every distinct label set
+    gets its own series.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [per-bucket counts, sum, count]
+        self._histograms: Dict[Tuple[str, Labels], list] = {}
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Return every series in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: [list(v[0]), v[1], v[2]] for k, v in self._histograms.items()}
+
+        lines: List[str] = []
+        for name, (kind, help_text) in METRICS.items():
+            source = counters if kind == "counter" else histograms
+            series = sorted((labels, v) for (n, labels), v in source.items() if n == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), bucket_counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    bucket_labels = _format_labels(labels, f'le="{le}"')
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def span_summary(self) -> List[Dict[str, object]]:
+        """Return the count, total and mean duration of every span name seen."""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for (name, labels), (_, total, count) in self._histograms.items():
+                if name != "dbt_sl_span_duration_seconds":
+                    continue
+                span_name = dict(labels).get("span", "")
+                entry = totals.setdefault(span_name, [0, 0.0, 0])
+                entry[0] += count
+                entry[1] += total
+                if dict(labels).get("status") == "error":
+                    entry[2] += count
+        return [
+            {
+                "span": name,
+                "count": int(count),
+                "errors": int(errors),
+                "total_seconds": total,
+                "mean_seconds": total / count if count else 0.0,
+            }
+            for name, (count, total, errors) in sorted(totals.items())
+        ]
+
+
+# Process-wide registry shared by every session and worker thread
+REGISTRY = MetricsRegistry()
+
+_current: ContextVar[Optional["Span"]] = ContextVar("dbt_sl_span", default=None)
+_tracer_lock = threading.Lock()
+_tracer = None
+
+
+def _otel_tracer():
+    """Return the OpenTelemetry tracer, or ``None`` when export is off."""
+    global _tracer
+    if trace is None or not OTLP_ENDPOINT:
+        return None
+    with _tracer_lock:
+        if _tracer is None:
+            # The exporter reads OTEL_EXPORTER_OTLP_* itself and appends /v1/traces
+            provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            _tracer = provider.get_tracer(__name__)
+            logger.info("Exporting spans endpoint=%s service=%s", OTLP_ENDPOINT, SERVICE_NAME)
+    return _tracer
+
+
+def _otel_value(value):
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class Span:
+    """A timed step of a request; ``set`` attributes and add ``event``s while it runs."""
+
+    __slots__ = ("name", "attributes", "events", "parent", "start", "duration", "_otel")
+
+    def __init__(self, name: str, attributes: Dict[str, object], parent: Optional["Span"]):
+        self.name = name
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.events: List[Tuple[str, float, Dict[str, object]]] = []
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self._otel = None
+
+    def set(self, **attributes) -> "Span":
+        attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.attributes.update(attributes)
+        if self._otel is not None:
+            self._otel.set_attributes({k: _otel_value(v) for k, v in attributes.items()})
+        return self
+
+    def add(self, key: str, value: float) -> "Span":
+        """Accumulate a numeric attribute, e.g. bytes over several reads."""
+        return self.set(**{key: self.attributes.get(key, 0) + value})
+
+    def event(self, name: str, **attributes) -> None:
+        attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.events.append((name, time.perf_counter() - self.start, attributes))
+        if self._otel is not None:
+            self._otel.add_event(name, {k: _otel_value(v) for k, v in attributes.items()})
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time the block as a span nested under the caller's current span.
+
+    The duration is recorded in ``dbt_sl_span_duration_seconds`` and, when
+    ``OTEL_EXPORTER_OTLP_ENDPOINT`` is set, the span is exported to the
+    collector with its attributes and events.  Spans should not be held
+    open across a generator's ``yield``.
+    """
+    current = Span(name, attributes, _current.get())
+    token = _current.set(current)
+    tracer = _otel_tracer()
+    otel_context = (
+        tracer.start_as_current_span(name, record_exception=False, set_status_on_exception=False)
+        if tracer is not None
+        else None
+    )
+    if otel_context is not None:
+        current._otel = otel_context.__enter__()
+        current.set(**current.attributes)
+    status = "ok"
+    try:
+        yield current
+    except BaseException as e:
+        status = "error"
+        if "error" not in current.attributes:
+            current.set(error=type(e).__name__)
+        if current._otel is not None:
+            current._otel.record_exception(e)
+            current._otel.set_status(trace.Status(trace.StatusCode.ERROR, str(e)[:200]))
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current.reset(token)
+        if otel_context is not None:
+            otel_context.__exit__(None, None, None)
+        REGISTRY.observe("dbt_sl_span_duration_seconds", current.duration, span=name, status=status)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "span=%s status=%s duration=%.4fs attributes=%s",
+                name,
+                status,
+                current.duration,
+                current.attributes,
+            )
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span in this context, if any."""
+    return _current.get()
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    REGISTRY.count(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    REGISTRY.observe(name, value, **labels)
+
+
+def metered(chunks: Iterable[bytes], into: Span) -> Iterator[bytes]:
+    """
+    Pass ``chunks`` through, adding the bytes read and the time spent waiting
+    for each one to ``into`` as ``response_bytes`` and ``download_seconds``.
+
+    Wrapping a streamed response this way separates network time from the
+    decode work done between reads.
+    """
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            into.add("download_seconds", time.perf_counter() - started)
+            return
+        into.add("download_seconds", time.perf_counter() - started)
+        into.add("response_bytes", len(chunk))
+        yield chunk
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 - http.server naming
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics %s", format % args)
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(
+    port: int = METRICS_PORT, host: str = METRICS_HOST
+) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve ``/metrics`` for Prometheus on ``host:port`` from a daemon thread.
+
+    Returns ``None`` when the endpoint is disabled or the port is taken,
+    e.g. by another replica on the same host.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started host=%s port=%s error=%s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving Prometheus metrics host=%s port=%s path=/metrics", host, port)
+    return server